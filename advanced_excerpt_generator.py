@@ -13,16 +13,55 @@ from typing import Dict, Any, Optional, List
 import logging
 from collections import Counter
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
 logger = logging.getLogger(__name__)
 
+# lxml is a much faster BeautifulSoup backend; fall back to the stdlib parser without it
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Text-processing patterns, compiled once
+_BOILERPLATE_CLASS_RE = re.compile(r'(ad|nav|menu|footer|sidebar|social)', re.I)
+_CONTENT_CLASS_RE = re.compile(r'(content|article|story)', re.I)
+_WHITESPACE_RE = re.compile(r'\s+')
+_SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+_LEADING_TITLE_RE = re.compile(r'^([^.!?]{10,100})')
+_SUMMARY_PREFIX_RE = re.compile(r'^(Summary:|Key points:|Excerpt:)', re.IGNORECASE)
+
+# Sentence-scoring vocabularies, each matched as one case-insensitive alternation
+BOILERPLATE_TERMS = ('share', 'save', 'follow', 'subscribe', 'newsletter', 'advertisement', 'click here',
+                     'read more', 'photograph:', 'view image', 'skip to', 'sign up', 'follow our')
+NEWS_INDICATORS = ('announced', 'reported', 'said', 'according to', 'revealed', 'confirmed', 'warned',
+                   'urged', 'called for', 'told', 'stated', 'explained')
+_BOILERPLATE_TERMS_RE = re.compile('|'.join(map(re.escape, BOILERPLATE_TERMS)), re.IGNORECASE)
+_NEWS_INDICATORS_RE = re.compile('|'.join(map(re.escape, NEWS_INDICATORS)), re.IGNORECASE)
+
+# Sentences scored when building an excerpt without the LLM
+MAX_SCORED_SENTENCES = 20
+
+def _iter_sentences(text: str, min_length: int = 20):
+    """Yield stripped sentences longer than min_length in one pass over text"""
+    last = 0
+    for match in _SENTENCE_SPLIT_RE.finditer(text):
+        sentence = text[last:match.start()].strip()
+        last = match.end()
+        if len(sentence) > min_length:
+            yield sentence
+    tail = text[last:].strip()
+    if len(tail) > min_length:
+        yield tail
+
 class AdvancedExcerptGenerator:
     """Advanced excerpt generator with intelligent text processing and redundancy reduction"""
     
     def __init__(self):
         self.target_words = 100
         self.tolerance = 0.15  # 15% tolerance
+        # Keep-alive session for article fetches
+        self.session = requests.Session()
     
     def generate_neutral_excerpt(self, url: str) -> Dict[str, Any]:
         """Generate a high-quality neutral excerpt from article URL"""
@@ -70,7 +109,7 @@ class AdvancedExcerptGenerator:
     def _fetch_article_content(self, url: str) -> Optional[str]:
         """Fetch article content from URL using synchronous requests"""
         try:
-            response = requests.get(url, timeout=30)
+            response = self.session.get(url, timeout=30)
             response.raise_for_status()
             return response.text
         except Exception as e:
@@ -81,35 +120,35 @@ class AdvancedExcerptGenerator:
         """Advanced content cleaning to remove boilerplate and deduplicate"""
         try:
             # Parse HTML and extract main text
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = BeautifulSoup(html_content, HTML_PARSER)
             
             # Remove navigation, footer, ads, and scripts
             for elem in soup(['nav', 'footer', 'script', 'style', 'header', 'aside']):
                 elem.decompose()
             
             # Remove elements with common ad/navigation classes
-            for elem in soup.find_all(class_=re.compile(r'(ad|nav|menu|footer|sidebar|social)', re.I)):
+            for elem in soup.find_all(class_=_BOILERPLATE_CLASS_RE):
                 elem.decompose()
             
             # Extract main content
-            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile(r'(content|article|story)', re.I))
+            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=_CONTENT_CLASS_RE)
             if main_content:
                 text = main_content.get_text(separator=' ', strip=True)
             else:
                 text = soup.get_text(separator=' ', strip=True)
             
             # Clean up whitespace and normalize
-            text = re.sub(r'\s+', ' ', text).strip()
+            text = _WHITESPACE_RE.sub(' ', text).strip()
             
             # Split into sentences and deduplicate
-            sentences = re.split(r'[.!?]+', text)
-            sentences = [s.strip() for s in sentences if s.strip() and len(s.strip()) > 20]
+            sentences = list(_iter_sentences(text))
             
             if len(sentences) > 10:  # Only deduplicate if we have enough sentences
                 # Compute TF-IDF and cosine similarity for deduplication
                 vectorizer = TfidfVectorizer(stop_words='english', max_features=1000)
                 tfidf_matrix = vectorizer.fit_transform(sentences)
-                similarity_matrix = cosine_similarity(tfidf_matrix)
+                # Rows are L2-normalised, so the sparse product is the cosine similarity
+                similarity_matrix = (tfidf_matrix @ tfidf_matrix.T).tocsr()
                 
                 # Keep sentences with similarity < 0.8
                 unique_sentences = []
@@ -117,10 +156,10 @@ class AdvancedExcerptGenerator:
                 for i, sent in enumerate(sentences):
                     if i not in used_indices and len(sent.strip()) > 20:  # Minimum sentence length
                         unique_sentences.append(sent.strip())
-                        # Mark similar sentences (threshold 0.8)
-                        for j, sim in enumerate(similarity_matrix[i]):
-                            if sim > 0.8 and i != j:
-                                used_indices.add(j)
+                        # Mark similar sentences (threshold 0.8) from the row's non-zeros
+                        start, end = similarity_matrix.indptr[i], similarity_matrix.indptr[i + 1]
+                        row_sims = similarity_matrix.data[start:end]
+                        used_indices.update(similarity_matrix.indices[start:end][row_sims > 0.8].tolist())
                 
                 # Limit to top 10 most relevant sentences
                 return ' '.join(unique_sentences[:10])
@@ -135,7 +174,7 @@ class AdvancedExcerptGenerator:
         """Extract key information with advanced processing"""
         try:
             # Extract title from content (look for common patterns)
-            title_match = re.search(r'^([^.!?]{10,100})', content)
+            title_match = _LEADING_TITLE_RE.search(content)
             title = title_match.group(1).strip() if title_match else "Article"
             
             # Clean and limit content for processing
@@ -154,25 +193,24 @@ class AdvancedExcerptGenerator:
     def _generate_excerpt_with_advanced_processing(self, content: str, original_title: str) -> str:
         """Generate excerpt using advanced text processing without LLM"""
         try:
-            # Split content into sentences
-            sentences = re.split(r'[.!?]+', content)
-            sentences = [s.strip() for s in sentences if s.strip() and len(s.strip()) > 20]
-            
-            if not sentences:
-                return f"{original_title}. Latest news update."
-            
-            # Remove duplicate sentences first
+            # Split content into sentences, removing duplicates in the same pass;
+            # only the first MAX_SCORED_SENTENCES unique ones are used, so stop there
             unique_sentences = []
             seen = set()
-            for sent in sentences:
-                sent_lower = sent.lower().strip()
-                if sent_lower not in seen and len(sent_lower) > 20:
+            for sent in _iter_sentences(content):
+                sent_lower = sent.lower()
+                if sent_lower not in seen:
                     unique_sentences.append(sent)
                     seen.add(sent_lower)
+                    if len(unique_sentences) == MAX_SCORED_SENTENCES:
+                        break
+            
+            if not unique_sentences:
+                return f"{original_title}. Latest news update."
             
             # Score sentences based on relevance and uniqueness
             scored_sentences = []
-            for i, sent in enumerate(unique_sentences[:20]):  # Limit to first 20 unique sentences
+            for i, sent in enumerate(unique_sentences):  # At most the first 20 unique sentences
                 score = self._score_sentence(sent, original_title)
                 scored_sentences.append((score, sent))
             
@@ -215,13 +253,11 @@ class AdvancedExcerptGenerator:
                 score += 0.2 * (len(common_words) / len(title_words))
             
             # Avoid boilerplate and navigation
-            boilerplate_terms = ['share', 'save', 'follow', 'subscribe', 'newsletter', 'advertisement', 'click here', 'read more', 'photograph:', 'view image', 'skip to', 'sign up', 'follow our']
-            if not any(term in sentence.lower() for term in boilerplate_terms):
+            if not _BOILERPLATE_TERMS_RE.search(sentence):
                 score += 0.2
             
             # Prefer sentences with key news indicators
-            news_indicators = ['announced', 'reported', 'said', 'according to', 'revealed', 'confirmed', 'warned', 'urged', 'called for', 'told', 'stated', 'explained']
-            if any(indicator in sentence.lower() for indicator in news_indicators):
+            if _NEWS_INDICATORS_RE.search(sentence):
                 score += 0.3
             
             # Prefer sentences with quotes or direct speech
@@ -251,7 +287,7 @@ class AdvancedExcerptGenerator:
             summary = summary.strip()
             
             # Remove common artifacts
-            summary = re.sub(r'^(Summary:|Key points:|Excerpt:)', '', summary, flags=re.IGNORECASE)
+            summary = _SUMMARY_PREFIX_RE.sub('', summary)
             summary = summary.strip()
             
             # Tokenize and count words
@@ -264,10 +300,8 @@ class AdvancedExcerptGenerator:
             
             if word_count > max_words:
                 # Truncate intelligently by sentences
-                sentences = re.split(r'[.!?]+', summary)
-                sentences = [s.strip() for s in sentences if s.strip()]
                 current_words = []
-                for sent in sentences:
+                for sent in _iter_sentences(summary, min_length=0):
                     sent_words = sent.split()
                     if len(current_words) + len(sent_words) <= max_words:
                         current_words.extend(sent_words)
@@ -311,12 +345,13 @@ class AdvancedExcerptGenerator:
                 word_score = max(0, 1 - abs(word_count - 100) / 50)
             
             # 2. Sentence diversity (0-1)
-            sentences = re.split(r'[.!?]+', excerpt)
+            sentences = _SENTENCE_SPLIT_RE.split(excerpt)
             sentences = [s.strip() for s in sentences if s.strip()]
             if len(sentences) > 1:
                 # Calculate sentence length diversity
                 sent_lengths = [len(sent.split()) for sent in sentences]
-                length_variance = sum((l - sum(sent_lengths)/len(sent_lengths))**2 for l in sent_lengths) / len(sent_lengths)
+                mean_length = sum(sent_lengths) / len(sent_lengths)
+                length_variance = sum((l - mean_length)**2 for l in sent_lengths) / len(sent_lengths)
                 diversity_score = min(1.0, length_variance / 100)
             else:
                 diversity_score = 0.5
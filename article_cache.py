@@ -9,8 +9,13 @@ import hashlib
 import sqlite3
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
+from collections import Counter
 import re
 
+# Capitalised phrases (locations) and exactly-two-word names (entities)
+_LOCATION_PATTERN = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b')
+_ENTITY_PATTERN = re.compile(r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\b')
+
 class ArticleCache:
     def __init__(self, db_path="beacon_articles.db"):
         self.db_path = db_path
@@ -36,6 +41,11 @@ class ArticleCache:
             )
         """)
         
+        # Recent-pattern lookups, stats and cleanup all filter on last_used
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{self.cache_table}_last_used ON {self.cache_table}(last_used)
+        """)
+        
         conn.commit()
         conn.close()
     
@@ -50,24 +60,24 @@ class ArticleCache:
         # Extract key phrases and entities
         content_lower = content.lower()
         
-        # Key patterns to look for
-        patterns = []
+        # Key patterns to look for, counted so the most frequent ones win
+        patterns = Counter()
         
         # Location patterns
-        location_patterns = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', content)
-        patterns.extend([loc for loc in location_patterns if len(loc) > 3])
+        location_patterns = _LOCATION_PATTERN.findall(content)
+        patterns.update(loc for loc in location_patterns if len(loc) > 3)
         
         # Event patterns
         event_keywords = ['shooting', 'attack', 'crash', 'fire', 'explosion', 'bombing', 'stabbing']
         for keyword in event_keywords:
             if keyword in content_lower:
-                patterns.append(keyword)
+                patterns[keyword] += 1
         
         # Entity patterns
-        entity_patterns = re.findall(r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\b', content)
-        patterns.extend([ent for ent in entity_patterns if len(ent.split()) == 2])
+        # The regex only matches two-word names, so no per-match split is needed
+        patterns.update(_ENTITY_PATTERN.findall(content))
         
-        return ' '.join(patterns[:10])  # Limit to 10 patterns
+        return ' '.join(pattern for pattern, _ in patterns.most_common(10))  # Limit to 10 patterns
     
     def get_cached_identifiers(self, content: str) -> Optional[Dict]:
         """Get cached identifiers for similar content"""
@@ -96,39 +106,38 @@ class ArticleCache:
         
         # Try pattern similarity match
         cursor.execute(f"""
-            SELECT identifiers, content_pattern FROM {self.cache_table}
+            SELECT id, identifiers, content_pattern FROM {self.cache_table}
             WHERE last_used >= ?
         """, (datetime.now() - timedelta(days=7),))  # Only recent cache
         
-        best_match = None
+        best_row = None
         best_similarity = 0
         
         for row in cursor.fetchall():
-            cached_identifiers = json.loads(row[0])
-            cached_pattern = row[1]
+            cached_pattern = row[2]
             
             # Calculate pattern similarity
             similarity = self._calculate_pattern_similarity(content_pattern, cached_pattern)
             
             if similarity > 0.7 and similarity > best_similarity:  # High similarity threshold
                 best_similarity = similarity
-                best_match = cached_identifiers
+                best_row = row
         
-        conn.close()
-        
-        if best_match:
-            # Update cache usage
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(f"""
-                UPDATE {self.cache_table} 
-                SET last_used = ?, use_count = use_count + 1
-                WHERE identifiers = ?
-            """, (datetime.now(), json.dumps(best_match)))
-            conn.commit()
+        if not best_row:
             conn.close()
+            return None
+        
+        # Update cache usage for the matched entry only
+        cursor.execute(f"""
+            UPDATE {self.cache_table} 
+            SET last_used = ?, use_count = use_count + 1
+            WHERE id = ?
+        """, (datetime.now(), best_row[0]))
+        conn.commit()
+        conn.close()
         
-        return best_match
+        # Only the winning entry's identifiers need decoding
+        return json.loads(best_row[1])
     
     def _calculate_pattern_similarity(self, pattern1: str, pattern2: str) -> float:
         """Calculate similarity between content patterns"""
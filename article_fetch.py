@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Shared article fetching for the sync generators.
+Downloads a page once and extracts its title, description and main text so the
+title, excerpt and identifier generators can all work from the same fetch.
+"""
+
+import html
+import logging
+import re
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:  # selectolax is optional; the regex extraction below is the fallback
+    HTMLParser = None
+
+logger = logging.getLogger(__name__)
+
+# Elements that never hold article text
+NON_CONTENT_TAGS = ('script', 'style', 'nav', 'header', 'footer', 'aside')
+
+# HTML extraction patterns, compiled once
+_TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+# og:title with its attributes in either order
+_OG_TITLE_RE = re.compile(
+    r'<meta[^>]+property=["\']og:title["\'][^>]*content=["\']([^"\']*)["\']'
+    r'|<meta[^>]+content=["\']([^"\']*)["\'][^>]*property=["\']og:title["\']',
+    re.IGNORECASE
+)
+_DESCRIPTION_RE = re.compile(r'<meta[^>]*name=["\']description["\'][^>]*content=["\']([^"\']*)["\']', re.IGNORECASE)
+# Script/style/nav/header/footer/aside blocks, stripped in a single pass
+_NON_CONTENT_RE = re.compile(r'<(script|style|nav|header|footer|aside)\b[^>]*>.*?</\1>', re.IGNORECASE | re.DOTALL)
+# Content elements' opening and closing tags
+_ARTICLE_OPEN_RE = re.compile(r'<article[^>]*>', re.IGNORECASE)
+_ARTICLE_CLOSE_RE = re.compile(r'</article>', re.IGNORECASE)
+_MAIN_OPEN_RE = re.compile(r'<main[^>]*>', re.IGNORECASE)
+_MAIN_CLOSE_RE = re.compile(r'</main>', re.IGNORECASE)
+_BODY_OPEN_RE = re.compile(r'<body', re.IGNORECASE)
+_UNCLOSED_NON_CONTENT_RE = re.compile(r'<(?:script|style|nav|header|footer|aside)\b.*\Z', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Browser-like headers; some news sites reject the default python-requests agent
+FETCH_HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+
+# Bytes of a page kept for parsing; the title, meta tags and start of the article
+# almost always fall within the first 256KB, and regex/DOM work grows with page size
+MAX_HTML_BYTES = 256 * 1024
+
+# parse_article works on decoded text, so its cap counts characters; the same figure as
+# MAX_HTML_BYTES, so an already byte-capped page is never cut further
+MAX_HTML_CHARS = MAX_HTML_BYTES
+
+# HTML scanned when a page has no <article> or <main> element
+MAX_UNSCOPED_CHARS = 50000
+
+def _find_region(page: str, open_re, close_re) -> Optional[str]:
+    """Inner HTML of the first element between open_re and close_re, without touching the rest of the page"""
+    open_match = open_re.search(page)
+    if not open_match:
+        return None
+    close_match = close_re.search(page, open_match.end())
+    if not close_match:
+        return None
+    return page[open_match.end():close_match.start()]
+
+def fetch_html(session, url: str) -> Optional[str]:
+    """Fetch a page's HTML with the given requests session"""
+    try:
+        # Stream the body and stop at MAX_HTML_BYTES; the generators only use the first few KB of text
+        with session.get(url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            body = bytearray()
+            for chunk in response.iter_content(16384):
+                body.extend(chunk)
+                if len(body) >= MAX_HTML_BYTES:
+                    break
+            return body.decode(response.encoding or "utf-8", errors="replace")
+    except Exception as e:
+        logger.error(f"❌ Error fetching article content: {e}")
+        return None
+
+def _extract_with_selectolax(page: str) -> Tuple[str, str, str]:
+    """Title, meta description and main text from a single DOM parse"""
+    tree = HTMLParser(page)
+
+    # Extract title, falling back to og:title
+    title_node = tree.css_first('title')
+    title = title_node.text().strip() if title_node is not None else ""
+    if not title:
+        og_node = tree.css_first('meta[property="og:title"]')
+        title = (og_node.attributes.get('content') or "") if og_node is not None else ""
+
+    # Extract meta description
+    desc_node = tree.css_first('meta[name="description"]')
+    description = (desc_node.attributes.get('content') or "").strip() if desc_node is not None else ""
+
+    # Drop non-content elements, then take the article, main or body text
+    tree.strip_tags(list(NON_CONTENT_TAGS))
+    node = tree.css_first('article')
+    if node is None:
+        node = tree.css_first('main')
+    if node is None:
+        node = tree.body
+    content = node.text(separator=' ') if node is not None else ""
+
+    return title, description, content
+
+def _extract_with_regex(page: str) -> Tuple[str, str, str]:
+    """Title, meta description and main text using regexes, for when selectolax is not installed"""
+    # Extract title, falling back to og:title
+    title_match = _TITLE_RE.search(page)
+    title = html.unescape(title_match.group(1).strip()) if title_match else ""
+    if not title:
+        og_match = _OG_TITLE_RE.search(page)
+        title = html.unescape(og_match.group(1) or og_match.group(2) or "") if og_match else ""
+
+    # Extract meta description
+    desc_match = _DESCRIPTION_RE.search(page)
+    description = desc_match.group(1).strip() if desc_match else ""
+
+    # Only the article (or main) region is kept, so strip markup from that slice rather than the whole page
+    region = _find_region(page, _ARTICLE_OPEN_RE, _ARTICLE_CLOSE_RE)
+    if region is None:
+        region = _find_region(page, _MAIN_OPEN_RE, _MAIN_CLOSE_RE)
+    if region is not None:
+        content = _NON_CONTENT_RE.sub('', region)
+    else:
+        # No content element: take a capped slice from the start of the body
+        body_match = _BODY_OPEN_RE.search(page)
+        start = body_match.start() if body_match else 0
+        content = _NON_CONTENT_RE.sub('', page[start:start + MAX_UNSCOPED_CHARS])
+        # Drop a block the cap cut off before its closing tag
+        content = _UNCLOSED_NON_CONTENT_RE.sub('', content)
+
+    return title, description, _TAG_RE.sub(' ', content)
+
+def parse_article(page: str) -> Dict[str, Any]:
+    """Extract title, meta description and main text from a page's HTML; the result is shared, so don't modify it"""
+    # Pages handed in by callers that fetched them themselves are capped too (in characters, as they are decoded)
+    return _parse_capped_page(page[:MAX_HTML_CHARS])
+
+# Re-polled feeds and repeat submissions hand back identical pages; each entry holds up to MAX_HTML_CHARS of page
+@lru_cache(maxsize=64)
+def _parse_capped_page(page: str) -> Dict[str, Any]:
+    """Parse a page already cut to MAX_HTML_CHARS"""
+    if HTMLParser is not None:
+        title, description, content = _extract_with_selectolax(page)
+    else:
+        title, description, content = _extract_with_regex(page)
+
+    return {
+        "raw": page,
+        "cleaned": _WHITESPACE_RE.sub(' ', content).strip(),
+        "title": title,
+        "description": description
+    }
+
+def fetch_article(session, url: str) -> Optional[Dict[str, Any]]:
+    """Fetch and parse an article, returning None if the download fails"""
+    page = fetch_html(session, url)
+    if not page:
+        return None
+    return parse_article(page)
@@ -4,122 +4,136 @@ Async processor for background LLM processing.
 Handles title, excerpt, and identifier generation, plus clustering.
 """
 
+import json
+import sqlite3
 import subprocess
 import sys
 import os
 import time
+import random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Optional
 import requests
+from sync_title_generator import SyncNeutralTitleGenerator
+from sync_excerpt_generator import SyncNeutralExcerptGenerator
+from sync_identifier_generator import SyncIdentifierGenerator
+from article_fetch import FETCH_HEADERS, MAX_HTML_BYTES, parse_article
+
+# Identifier fields written to identifier_1..identifier_6
+IDENTIFIER_FIELDS = ('topic_primary', 'topic_secondary', 'entity_primary',
+                     'entity_secondary', 'location_primary', 'event_or_policy')
+
+# Article fetch settings
+FETCH_ATTEMPTS = 3
+
+# Characters of article text stored with the article
+MAX_STORED_CONTENT_CHARS = 5000
+
+# Directory holding this module and its sibling Beacon modules such as clustering_service
+BEACON_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Shared clustering service, created on first use
+_clustering_service = None
+
+def get_clustering_service():
+    """Get the shared clustering service instance"""
+    global _clustering_service
+    if _clustering_service is None:
+        if BEACON_DIR not in sys.path:
+            sys.path.append(BEACON_DIR)
+        from clustering_service import ClusteringService
+        _clustering_service = ClusteringService()
+    return _clustering_service
 
 class AsyncProcessor:
     def __init__(self):
-        self.base_path = "/root/Beacon"
+        # Keep-alive session for article fetches
+        self.session = requests.Session()
+        
+        # Generators are created once and reused for every article
+        self.title_generator = SyncNeutralTitleGenerator()
+        self.excerpt_generator = SyncNeutralExcerptGenerator()
+        self.identifier_generator = SyncIdentifierGenerator()
+        
+        # Title, excerpt and identifier generation wait on Ollama, so run them together
+        self.executor = ThreadPoolExecutor(max_workers=4)
         
     def process_article(self, article_id: int, url: str):
         """Process article in background: title, excerpt, identifiers, clustering"""
         print(f"Starting async processing for article {article_id}")
         
         try:
-            # Step 1: Generate title
-            print("Generating title...")
-            title_result = subprocess.run([
-                "python3", f"{self.base_path}/sync_title_generator.py", url
-            ], capture_output=True, text=True, timeout=120)
-            
-            if title_result.returncode != 0:
-                print(f"Title generation failed: {title_result.stderr}")
-                return False
-            
-            # Step 2: Generate excerpt
-            print("Generating excerpt...")
-            excerpt_result = subprocess.run([
-                "python3", f"{self.base_path}/sync_excerpt_generator.py", url
-            ], capture_output=True, text=True, timeout=120)
-            
-            if excerpt_result.returncode != 0:
-                print(f"Excerpt generation failed: {excerpt_result.stderr}")
-                return False
-            
-            # Step 3: Generate identifiers
-            print("Generating identifiers...")
-            identifier_result = subprocess.run([
-                "python3", f"{self.base_path}/sync_identifier_generator.py", url
-            ], capture_output=True, text=True, timeout=180)
-            
-            if identifier_result.returncode != 0:
-                print(f"Identifier generation failed: {identifier_result.stderr}")
-                return False
-            
-            # Step 4: Fetch article content
+            # Step 1: Fetch the article once; the generators and content extraction share it
             print("Fetching article content...")
-            import json
-            import re
-            from bs4 import BeautifulSoup
-            
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            response = requests.get(url, headers=headers, timeout=30)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'iframe']):
-                    element.decompose()
-                
-                selectors = ['article', '[role="main"]', '.article-content', '.post-content', '.entry-content', 'main']
-                article_content = ""
-                for selector in selectors:
-                    elem = soup.select_one(selector)
-                    if elem:
-                        article_content = elem.get_text().strip()
-                        break
-                
-                if not article_content:
-                    body = soup.find('body')
-                    if body:
-                        article_content = body.get_text().strip()
-                
-                article_content = re.sub(r'\s+', ' ', article_content)
-                article_content = article_content[:5000]
-            else:
-                article_content = ""
-            
-            # Step 5: Parse results
-            print("Parsing results...")
-            
-            # Parse title
-            title_match = re.search(r"'neutral_title':\s*'([^']+)'", title_result.stdout)
-            title = title_match.group(1) if title_match else "Processing..."
-            
-            # Parse excerpt (handle escaped quotes)
-            excerpt_match = re.search(r"'neutral_excerpt':\s*'(.+?)',\s*'word_count'", excerpt_result.stdout, re.DOTALL)
-            if not excerpt_match:
-                excerpt_match = re.search(r"'neutral_excerpt':\s*\"(.+?)\",\s*'word_count'", excerpt_result.stdout, re.DOTALL)
-            excerpt = excerpt_match.group(1) if excerpt_match else ""
-            
-            # Parse identifiers (already handled by parse_identifier_output)
-            identifiers = self.parse_identifier_output(identifier_result.stdout)
-            
-            # Step 6: Update database with results
+            page = self._fetch_page(url)
+            if page is None:
+                # _fetch_page has already retried; the generators would only refetch the same failing URL
+                print(f"Could not fetch article {article_id}; skipping generation")
+                return False
+            # Cap the bytes before decoding, like fetch_html, and decode with the declared charset (or UTF-8)
+            # rather than page.text, which runs charset detection over the whole body
+            html = page.content[:MAX_HTML_BYTES].decode(page.encoding or "utf-8", errors="replace")
+            prefetched = parse_article(html)
+            
+            # Steps 2-4: Generate title, excerpt and identifiers concurrently
+            print("Generating title, excerpt and identifiers...")
+            title_future = self.executor.submit(self.title_generator.generate_neutral_title, url, prefetched)
+            excerpt_future = self.executor.submit(self.excerpt_generator.generate_neutral_excerpt, url, prefetched)
+            identifier_future = self.executor.submit(self.identifier_generator.generate_identifiers, url, prefetched)
+            
+            # Step 5: Store the main article text from the same parse the generators use
+            article_content = prefetched["cleaned"][:MAX_STORED_CONTENT_CHARS]
+            
+            # Step 6: Collect results
+            print("Collecting results...")
+            title_result = title_future.result()
+            excerpt_result = excerpt_future.result()
+            identifier_result = identifier_future.result()
+            title = title_result.get("neutral_title") or "Processing..."
+            excerpt = excerpt_result.get("neutral_excerpt") or ""
+            identifiers = identifier_result or dict.fromkeys(IDENTIFIER_FIELDS, '')
+            
+            # Step 7: Update database with results
             print("Updating database...")
             self.update_database(article_id, title, excerpt, identifiers, article_content)
             
-            # Step 5: Process clustering
+            # Step 8: Process clustering
             print("Processing clustering...")
-            self.process_clustering(article_id, url)
+            self.process_clustering(article_id, url, excerpt, identifiers)
             
             print(f"Async processing completed for article {article_id}")
             return True
             
-        except subprocess.TimeoutExpired:
-            print(f"Processing timed out for article {article_id}")
-            return False
         except Exception as e:
             print(f"Error processing article {article_id}: {e}")
             return False
     
+    def _fetch_page(self, url: str) -> Optional[requests.Response]:
+        """Fetch the article page, retrying only transient failures"""
+        for attempt in range(FETCH_ATTEMPTS):
+            try:
+                response = self.session.get(url, headers=FETCH_HEADERS, timeout=30)
+                if response.status_code == 200:
+                    return response
+                
+                # Client errors other than rate limiting will not succeed on retry
+                if response.status_code < 500 and response.status_code != 429:
+                    print(f"Fetch failed with status {response.status_code}")
+                    return None
+                print(f"Fetch attempt {attempt + 1} got status {response.status_code}")
+            except (requests.Timeout, requests.ConnectionError) as e:
+                print(f"Fetch attempt {attempt + 1} failed: {e}")
+            
+            if attempt < FETCH_ATTEMPTS - 1:
+                # Jittered exponential backoff
+                time.sleep(min(8, 0.5 * 2 ** attempt) + random.random() * 0.25)
+        
+        return None
+    
     def update_database(self, article_id: int, title: str, excerpt: str, identifiers: dict, content: str):
         """Update database with generated content"""
         try:
-            import json
             # Escape all values for safe embedding
             title_safe = title.replace("'", "''")
             excerpt_safe = excerpt.replace("'", "''")
@@ -177,82 +191,40 @@ print("Database updated successfully")
         except Exception as e:
             print(f"Error updating database: {e}")
     
-    def parse_identifier_output(self, output: str):
-        """Parse identifier generator output"""
-        try:
-            # Look for JSON in the output
-            import json
-            import re
-            import ast
-            
-            # Try to find the dict after "Generated identifiers:"
-            json_match = re.search(r"Generated identifiers:\s*(\{.+?\})\s*\n", output, re.DOTALL)
-            if json_match:
-                dict_str = json_match.group(1)
-                # Use ast.literal_eval to safely parse Python dict with apostrophes
-                return ast.literal_eval(dict_str)
-        except Exception as e:
-            print(f"Error parsing identifiers: {e}")
-            print(f"Output was: {output[:500]}")
-            pass
-        
-        # Fallback: return empty structure
-        return {
-            'topic_primary': '',
-            'topic_secondary': '',
-            'entity_primary': '',
-            'entity_secondary': '',
-            'location_primary': '',
-            'event_or_policy': ''
-        }
-    
-    def process_clustering(self, article_id: int, url: str):
+    def process_clustering(self, article_id: int, url: str, excerpt: Optional[str] = None,
+                           identifiers: Optional[dict] = None):
         """Process clustering for the article"""
         try:
-            # Get short content for clustering from DB (use excerpt)
-            import sqlite3
-            conn_local = sqlite3.connect('beacon_articles.db')
-            cur = conn_local.cursor()
-            cur.execute('SELECT excerpt FROM articles WHERE article_id = ?', (article_id,))
-            row = cur.fetchone()
-            conn_local.close()
-            content = (row[0] or '') if row else ''
-            content = content[:1500]
-
-            # Run clustering - call directly instead of via subprocess to avoid f-string issues
-            import sqlite3
-            conn_cluster = sqlite3.connect('beacon_articles.db')
-            cursor_cluster = conn_cluster.cursor()
-            cursor_cluster.execute('''
-                SELECT identifier_1, identifier_2, identifier_3, 
-                       identifier_4, identifier_5, identifier_6
-                FROM articles WHERE article_id = ?
-            ''', (article_id,))
-            result = cursor_cluster.fetchone()
-            conn_cluster.close()
-            
-            if result:
-                identifiers_dict = {
-                    'topic_primary': result[0] or '',
-                    'topic_secondary': result[1] or '',
-                    'entity_primary': result[2] or '',
-                    'entity_secondary': result[3] or '',
-                    'location_primary': result[4] or '',
-                    'event_or_policy': result[5] or ''
-                }
+            if excerpt is None or identifiers is None:
+                # Read the excerpt and identifiers back in a single query
+                conn = sqlite3.connect('beacon_articles.db')
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT excerpt, identifier_1, identifier_2, identifier_3, 
+                           identifier_4, identifier_5, identifier_6
+                    FROM articles WHERE article_id = ?
+                ''', (article_id,))
+                row = cursor.fetchone()
+                conn.close()
                 
-                # Import and call clustering service directly
-                sys.path.append(self.base_path)
-                from clustering_service import ClusteringService
-                service = ClusteringService()
-                cluster_id = service.process_clustering(article_id, identifiers_dict, content)
+                if not row:
+                    print('No identifiers found for clustering')
+                    return
                 
-                if cluster_id:
-                    print(f'Article clustered with ID: {cluster_id}')
-                else:
-                    print('No clustering performed')
+                excerpt = row[0] or ''
+                identifiers = {field: value or '' for field, value in zip(IDENTIFIER_FIELDS, row[1:])}
+            
+            # Use the excerpt as short content for clustering
+            content = excerpt[:1500]
+            
+            # Call the shared clustering service directly
+            service = get_clustering_service()
+            cluster_id = service.process_clustering(article_id, identifiers, content)
+            
+            if cluster_id:
+                print(f'Article clustered with ID: {cluster_id}')
             else:
-                print('No identifiers found for clustering')
+                print('No clustering performed')
                 
         except Exception as e:
             print(f"Error processing clustering: {e}")
@@ -8,10 +8,14 @@ import redis
 import json
 import time
 import threading
-from typing import Dict, List, Any
+import random
+from typing import Dict, List, Any, Optional
 import requests
-import subprocess
 import os
+from article_fetch import fetch_article
+from sync_title_generator import SyncNeutralTitleGenerator
+from sync_excerpt_generator import SyncNeutralExcerptGenerator
+from sync_identifier_generator import SyncIdentifierGenerator
 
 class AsyncQueueProcessor:
     def __init__(self, redis_host="localhost", redis_port=6379, redis_db=0):
@@ -19,11 +23,19 @@ class AsyncQueueProcessor:
         self.queue_name = "article_processing_queue"
         self.result_queue = "article_results_queue"
         self.worker_count = 3  # Number of worker threads
+        self.max_queue_length = 16  # enqueue_article blocks while this many jobs are pending
+        self.backoff_base = 1  # Seconds before the first retry after a worker error
+        self.backoff_max = 60
         self.workers = []
         self.running = False
+        
+        # Generators run in-process and are shared by the worker threads; their sessions are thread-safe
+        self.title_generator = SyncNeutralTitleGenerator()
+        self.excerpt_generator = SyncNeutralExcerptGenerator()
+        self.identifier_generator = SyncIdentifierGenerator()
     
-    def enqueue_article(self, article_data: Dict) -> str:
-        """Add article to processing queue"""
+    def enqueue_article(self, article_data: Dict, timeout: float = 60) -> Optional[str]:
+        """Add article to processing queue, or return None if it stays full for timeout seconds"""
         job_id = f"job_{int(time.time() * 1000)}"
         job_data = {
             "job_id": job_id,
@@ -32,6 +44,15 @@ class AsyncQueueProcessor:
             "status": "queued"
         }
         
+        # Backpressure: wait for the workers to drain the queue instead of letting it grow unbounded,
+        # but give up if they have stopped draining it
+        deadline = time.monotonic() + timeout
+        while self.redis_client.llen(self.queue_name) >= self.max_queue_length:
+            if time.monotonic() >= deadline:
+                print(f"Queue still full after {timeout}s; article not enqueued")
+                return None
+            time.sleep(0.5)
+        
         self.redis_client.lpush(self.queue_name, json.dumps(job_data))
         return job_id
     
@@ -45,6 +66,16 @@ class AsyncQueueProcessor:
         else:
             return {"status": "not_found"}
     
+    def wait_for_result(self, job_id: str, timeout: float = 120, poll_interval: float = 0.5) -> Dict:
+        """Wait until a job has a stored result or the timeout expires"""
+        deadline = time.monotonic() + timeout
+        
+        while True:
+            result = self.get_job_result(job_id)
+            if result.get("status") != "not_found" or time.monotonic() >= deadline:
+                return result
+            time.sleep(poll_interval)
+    
     def start_workers(self):
         """Start worker threads for processing articles"""
         self.running = True
@@ -67,6 +98,7 @@ class AsyncQueueProcessor:
     def _worker_loop(self, worker_id: int):
         """Main worker loop for processing articles"""
         print(f"Worker {worker_id} started")
+        consecutive_errors = 0
         
         while self.running:
             try:
@@ -88,9 +120,14 @@ class AsyncQueueProcessor:
                     
                     print(f"Worker {worker_id} completed job {job['job_id']}")
                 
+                consecutive_errors = 0
+                
             except Exception as e:
-                print(f"Worker {worker_id} error: {e}")
-                time.sleep(1)
+                # Exponential backoff with jitter so a failing Redis/Ollama isn't hammered by every worker at once
+                delay = min(self.backoff_max, self.backoff_base * 2 ** consecutive_errors) + random.uniform(0, 1)
+                consecutive_errors += 1
+                print(f"Worker {worker_id} error: {e} (retrying in {delay:.1f}s)")
+                time.sleep(delay)
     
     def _process_article(self, job: Dict) -> Dict:
         """Process a single article"""
@@ -105,16 +142,19 @@ class AsyncQueueProcessor:
                 "started_at": time.time()
             }
             
+            # Fetch the article once for all three generators
+            prefetched = fetch_article(self.title_generator.session, article_data.get("url", ""))
+            
             # Generate title
-            title_result = self._generate_title(article_data)
+            title_result = self._generate_title(article_data, prefetched)
             result["title"] = title_result.get("title", "")
             
             # Generate excerpt
-            excerpt_result = self._generate_excerpt(article_data)
+            excerpt_result = self._generate_excerpt(article_data, prefetched)
             result["excerpt"] = excerpt_result.get("excerpt", "")
             
             # Generate identifiers
-            identifiers_result = self._generate_identifiers(article_data)
+            identifiers_result = self._generate_identifiers(article_data, prefetched)
             result["identifiers"] = identifiers_result
             
             # Update status to completed
@@ -132,83 +172,30 @@ class AsyncQueueProcessor:
                 "completed_at": time.time()
             }
     
-    def _generate_title(self, article_data: Dict) -> Dict:
+    def _generate_title(self, article_data: Dict, prefetched: Optional[Dict[str, Any]] = None) -> Dict:
         """Generate title for article"""
         try:
-            # Call title generator
-            result = subprocess.run([
-                "python3", "sync_title_generator.py", 
-                article_data.get("url", "")
-            ], capture_output=True, text=True, timeout=60)
-            
-            if result.returncode == 0:
-                # Parse result
-                import re
-                title_match = re.search(r"'title': '([^']+)'", result.stdout)
-                if title_match:
-                    return {"title": title_match.group(1)}
-            
-            return {"title": ""}
+            result = self.title_generator.generate_neutral_title(article_data.get("url", ""), prefetched)
+            return {"title": result.get("neutral_title", "")}
             
         except Exception as e:
             print(f"Title generation error: {e}")
             return {"title": ""}
     
-    def _generate_excerpt(self, article_data: Dict) -> Dict:
+    def _generate_excerpt(self, article_data: Dict, prefetched: Optional[Dict[str, Any]] = None) -> Dict:
         """Generate excerpt for article"""
         try:
-            # Call excerpt generator
-            result = subprocess.run([
-                "python3", "sync_excerpt_generator.py", 
-                article_data.get("url", "")
-            ], capture_output=True, text=True, timeout=60)
-            
-            if result.returncode == 0:
-                # Parse result
-                import re
-                excerpt_match = re.search(r"'neutral_excerpt': '([^']+)'", result.stdout)
-                if excerpt_match:
-                    return {"excerpt": excerpt_match.group(1)}
-            
-            return {"excerpt": ""}
+            result = self.excerpt_generator.generate_neutral_excerpt(article_data.get("url", ""), prefetched)
+            return {"excerpt": result.get("neutral_excerpt", "")}
             
         except Exception as e:
             print(f"Excerpt generation error: {e}")
             return {"excerpt": ""}
     
-    def _generate_identifiers(self, article_data: Dict) -> Dict:
+    def _generate_identifiers(self, article_data: Dict, prefetched: Optional[Dict[str, Any]] = None) -> Dict:
         """Generate identifiers for article"""
         try:
-            # Call identifier generator
-            result = subprocess.run([
-                "python3", "sync_identifier_generator.py", 
-                article_data.get("url", "")
-            ], capture_output=True, text=True, timeout=60)
-            
-            if result.returncode == 0:
-                # Parse result
-                import re
-                identifiers = {}
-                field_mapping = {
-                    'topic_primary': 'topic_primary',
-                    'topic_secondary': 'topic_secondary',
-                    'entity_primary': 'entity_primary',
-                    'entity_secondary': 'entity_secondary',
-                    'location_primary': 'location_primary',
-                    'event_or_policy': 'event_or_policy'
-                }
-                
-                for field, key in field_mapping.items():
-                    pattern = rf"'{field}': '([^']*)'"
-                    match = re.search(pattern, result.stdout)
-                    if match:
-                        identifiers[key] = match.group(1)
-                    else:
-                        identifiers[key] = ""
-                
-                return identifiers
-            
-            return {}
+            return self.identifier_generator.generate_identifiers(article_data.get("url", ""), prefetched) or {}
             
         except Exception as e:
             print(f"Identifier generation error: {e}")
@@ -250,16 +237,17 @@ def main():
     job_ids = []
     for article in test_articles:
         job_id = processor.enqueue_article(article)
+        if job_id is None:
+            continue
         job_ids.append(job_id)
         print(f"Enqueued article: {job_id}")
     
-    # Wait for processing
+    # Wait for processing, returning as soon as each job finishes
     print("Waiting for processing...")
-    time.sleep(30)  # Wait 30 seconds
     
     # Check results
     for job_id in job_ids:
-        result = processor.get_job_result(job_id)
+        result = processor.wait_for_result(job_id, timeout=120)
         print(f"Job {job_id}: {result.get('status', 'unknown')}")
         if result.get('status') == 'completed':
             print(f"  Title: {result.get('title', 'N/A')}")
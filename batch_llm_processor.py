@@ -10,10 +10,50 @@ import re
 from typing import List, Dict, Any
 import time
 
+# Static instructions come first so Ollama can reuse the cached prompt prefix across batches
+IDENTIFIER_PROMPT_PREFIX = """Extract identifiers from each of the articles below.
+
+For each article, provide:
+**Main topic:** [2-4 words]
+**Secondary topic:** [2-4 words]  
+**Main person/org:** [2-4 words]
+**Secondary entity:** [2-4 words]
+**Main location:** [2-4 words]
+**Specific event:** [2-4 words]
+
+Format as: Article 1: [identifiers], Article 2: [identifiers], etc.
+
+"""
+
+TITLE_PROMPT_PREFIX = """Generate neutral titles for each of the articles below.
+
+Format as: Article 1: [title], Article 2: [title], etc.
+
+"""
+
+# Response-parsing patterns, compiled once
+FIELD_KEYS = {
+    'main topic': 'topic_primary',
+    'secondary topic': 'topic_secondary',
+    'main person/org': 'entity_primary',
+    'secondary entity': 'entity_secondary',
+    'main location': 'location_primary',
+    'specific event': 'event_or_policy'
+}
+_ARTICLE_HEADER_RE = re.compile(r'Article (\d+)', re.IGNORECASE)
+_FIELD_RE = re.compile(
+    r'\*\*(' + '|'.join(map(re.escape, FIELD_KEYS)) + r'):\*\*\s*([^\n]+)', re.IGNORECASE
+)
+_TITLE_LINE_RE = re.compile(r'Article (\d+):\s*([^\n]+)', re.IGNORECASE)
+_MARKDOWN_BOLD_RE = re.compile(r'\*\*')
+_TITLE_PREFIX_RE = re.compile(r'^[^:]*:')
+
 class BatchLLMProcessor:
     def __init__(self, ollama_url="http://localhost:11434/api/generate", model="gemma:2b"):
         self.ollama_url = ollama_url
         self.model = model
+        # Keep-alive session so batches reuse the Ollama connection
+        self.session = requests.Session()
     
     def process_batch_identifiers(self, articles: List[Dict]) -> List[Dict]:
         """Process multiple articles for identifiers in a single LLM call"""
@@ -27,22 +67,10 @@ class BatchLLMProcessor:
             batch_content += f"Article {i}:\n{content}\n\n"
         
         # Create batch prompt
-        prompt = f"""Extract identifiers from these {len(articles)} articles:
-
-{batch_content}
-
-For each article, provide:
-**Main topic:** [2-4 words]
-**Secondary topic:** [2-4 words]  
-**Main person/org:** [2-4 words]
-**Secondary entity:** [2-4 words]
-**Main location:** [2-4 words]
-**Specific event:** [2-4 words]
-
-Format as: Article 1: [identifiers], Article 2: [identifiers], etc."""
+        prompt = IDENTIFIER_PROMPT_PREFIX + batch_content
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.ollama_url,
                 json={
                     "model": self.model,
@@ -70,40 +98,28 @@ Format as: Article 1: [identifiers], Article 2: [identifiers], etc."""
     
     def _parse_batch_response(self, response_text: str, num_articles: int) -> List[Dict]:
         """Parse batch LLM response"""
-        results = []
+        # Split the response into per-article sections in one scan
+        headers = list(_ARTICLE_HEADER_RE.finditer(response_text))
+        sections = {}
+        for index, header in enumerate(headers):
+            number = int(header.group(1))
+            if number not in sections:
+                end = headers[index + 1].start() if index + 1 < len(headers) else len(response_text)
+                sections[number] = response_text[header.start():end]
         
-        # Look for each article's identifiers
+        results = []
         for i in range(1, num_articles + 1):
-            article_identifiers = {}
-            
-            # Try to find identifiers for this article
-            article_pattern = rf'Article {i}.*?(?=Article {i+1}|$)'
-            match = re.search(article_pattern, response_text, re.DOTALL | re.IGNORECASE)
+            # Fields missing from the response stay empty
+            article_identifiers = dict.fromkeys(FIELD_KEYS.values(), '')
             
-            if match:
-                article_text = match.group(0)
-                
-                # Extract each field
-                fields = ['Main topic', 'Secondary topic', 'Main person/org', 'Secondary entity', 'Main location', 'Specific event']
-                field_keys = ['topic_primary', 'topic_secondary', 'entity_primary', 'entity_secondary', 'location_primary', 'event_or_policy']
-                
-                for field, key in zip(fields, field_keys):
-                    pattern = rf'\*\*{re.escape(field)}:\*\*\s*([^\n]+)'
-                    field_match = re.search(pattern, article_text, re.IGNORECASE)
-                    if field_match:
-                        article_identifiers[key] = field_match.group(1).strip()
-                    else:
-                        article_identifiers[key] = ''
-            else:
-                # Fallback: create empty identifiers
-                article_identifiers = {
-                    'topic_primary': '',
-                    'topic_secondary': '',
-                    'entity_primary': '',
-                    'entity_secondary': '',
-                    'location_primary': '',
-                    'event_or_policy': ''
-                }
+            article_text = sections.get(i)
+            if article_text:
+                found = set()
+                for field_match in _FIELD_RE.finditer(article_text):
+                    key = FIELD_KEYS[field_match.group(1).lower()]
+                    if key not in found:
+                        article_identifiers[key] = field_match.group(2).strip()
+                        found.add(key)
             
             results.append(article_identifiers)
         
@@ -120,14 +136,10 @@ Format as: Article 1: [identifiers], Article 2: [identifiers], etc."""
             content = article.get('content', '')[:1000]
             batch_content += f"Article {i}:\n{content}\n\n"
         
-        prompt = f"""Generate neutral titles for these {len(articles)} articles:
-
-{batch_content}
-
-Format as: Article 1: [title], Article 2: [title], etc."""
+        prompt = TITLE_PROMPT_PREFIX + batch_content
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.ollama_url,
                 json={
                     "model": self.model,
@@ -155,16 +167,18 @@ Format as: Article 1: [title], Article 2: [title], etc."""
     
     def _parse_batch_titles(self, response_text: str, num_articles: int) -> List[str]:
         """Parse batch title response"""
-        titles = []
+        found = {}
+        for match in _TITLE_LINE_RE.finditer(response_text):
+            found.setdefault(int(match.group(1)), match.group(2))
         
+        titles = []
         for i in range(1, num_articles + 1):
-            pattern = rf'Article {i}:\s*([^\n]+)'
-            match = re.search(pattern, response_text, re.IGNORECASE)
-            if match:
-                title = match.group(1).strip()
+            title = found.get(i)
+            if title is not None:
+                title = title.strip()
                 # Clean title
-                title = re.sub(r'\*\*', '', title)  # Remove markdown
-                title = re.sub(r'^[^:]*:', '', title)  # Remove prefixes
+                title = _MARKDOWN_BOLD_RE.sub('', title)  # Remove markdown
+                title = _TITLE_PREFIX_RE.sub('', title)  # Remove prefixes
                 titles.append(title)
             else:
                 titles.append(f"Article {i} Title")
@@ -186,9 +200,9 @@ def main():
     ]
     
     print("Testing batch identifier processing...")
-    start_time = time.time()
+    start_time = time.monotonic()
     identifiers = processor.process_batch_identifiers(test_articles)
-    end_time = time.time()
+    end_time = time.monotonic()
     
     print(f"Batch processing completed in {end_time - start_time:.2f} seconds")
     print(f"Processed {len(identifiers)} articles")
@@ -3,28 +3,31 @@
 Beacon Database - SQLite database for storing articles with sourced and written dates
 """
 
-import sqlite3
 import json
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any
 import logging
+from database_pool import get_db_pool
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Columns that update_article is allowed to modify
+UPDATABLE_FIELDS = frozenset({'url', 'date_sourced', 'date_written', 'title', 'content', 'excerpt', 'source'})
+
 class BeaconDatabase:
     """Database class for storing Beacon articles with sourced and written dates"""
     
     def __init__(self, db_path: str = "beacon_articles.db"):
         """Initialize the database connection"""
         self.db_path = db_path
+        # Pooled connections; sqlite3.connect's context manager commits but never closes
+        self.db_pool = get_db_pool(db_path)
         self.init_database()
     
     def init_database(self):
         """Create the articles table if it doesn't exist"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db_pool.get_connection() as conn:
                 cursor = conn.cursor()
                 
                 # Create articles table
@@ -47,6 +50,11 @@ class BeaconDatabase:
                     CREATE INDEX IF NOT EXISTS idx_url ON articles(url)
                 ''')
                 
+                # Create index on created_at for newest-first listings and recent-article scans
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_created_at ON articles(created_at)
+                ''')
+                
                 conn.commit()
                 logger.info("✅ Database initialized successfully")
                 
@@ -73,7 +81,7 @@ class BeaconDatabase:
             # Get current UTC timestamp for date_sourced
             date_sourced = datetime.now(timezone.utc).isoformat()
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db_pool.get_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -94,8 +102,7 @@ class BeaconDatabase:
     def get_article(self, article_id: int) -> Optional[Dict[str, Any]]:
         """Get an article by ID"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.db_pool.get_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -114,8 +121,7 @@ class BeaconDatabase:
     def get_all_articles(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get all articles, ordered by newest first"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.db_pool.get_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -134,8 +140,7 @@ class BeaconDatabase:
     def get_article_by_url(self, url: str) -> Optional[Dict[str, Any]]:
         """Get an article by URL"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.db_pool.get_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -159,7 +164,7 @@ class BeaconDatabase:
             values = []
             
             for key, value in kwargs.items():
-                if key in ['url', 'date_sourced', 'date_written', 'title', 'content', 'excerpt', 'source']:
+                if key in UPDATABLE_FIELDS:
                     fields.append(f"{key} = ?")
                     values.append(value)
             
@@ -168,7 +173,7 @@ class BeaconDatabase:
             
             values.append(article_id)
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db_pool.get_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute(f'''
@@ -188,7 +193,7 @@ class BeaconDatabase:
     def delete_article(self, article_id: int) -> bool:
         """Delete an article by ID"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db_pool.get_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -206,7 +211,7 @@ class BeaconDatabase:
     def get_stats(self) -> Dict[str, Any]:
         """Get database statistics"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db_pool.get_connection() as conn:
                 cursor = conn.cursor()
                 
                 # Total articles
@@ -239,6 +244,8 @@ class BeaconDatabase:
 
 # Test the database
 if __name__ == "__main__":
+    # Configure logging only when run directly; importers keep their own setup
+    logging.basicConfig(level=logging.INFO)
     print("🧪 Testing Beacon Database...")
     
     # Initialize database
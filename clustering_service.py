@@ -7,17 +7,94 @@ Implements the 6-typed identifier clustering logic.
 import requests
 import json
 import re
+import time
+import random
 from typing import Dict, List, Tuple, Optional
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import sqlite3
 from datetime import datetime, timedelta
 from similarity_index import SimilarityIndex
 from database_pool import get_db_pool
+import fast_json
+
+# Deletes the ASCII characters matched by [^\w\s-]; non-ASCII text falls back to the regex
+_PUNCT_PATTERN = re.compile(r'[^\w\s-]')
+_ASCII_PUNCT_TABLE = {i: None for i in range(128) if _PUNCT_PATTERN.match(chr(i))}
+
+# Words that indicate the same topic when both identifiers contain them
+_KEY_WORDS = frozenset({'church', 'shooting', 'michigan', 'gunman', 'attack', 'fire', 'mormon'})
+
+# Ollama calls retry transient failures this many times, backing off from OLLAMA_BACKOFF_BASE seconds
+OLLAMA_ATTEMPTS = 3
+OLLAMA_BACKOFF_BASE = 0.25
+
+# Sentence boundaries and capitalised words used to pick salient sentences for the LLM prompt
+_SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?])\s+')
+_CAPITALISED_WORD_RE = re.compile(r'\b[A-Z][a-z]+')
+
+@lru_cache(maxsize=256)
+def _select_salient(content: str, max_chars: int = 1800) -> str:
+    """Pick the most entity-dense sentences that fit in max_chars, kept in article order"""
+    if len(content) <= max_chars:
+        return content
+    
+    sentences = [s for s in _SENTENCE_BOUNDARY_RE.split(content) if s]
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: len(sentences[i].split()) * (1 + len(_CAPITALISED_WORD_RE.findall(sentences[i]))),
+        reverse=True
+    )
+    
+    chosen = []
+    used = 0
+    for i in ranked:
+        length = len(sentences[i]) + 1
+        if used + length <= max_chars:
+            chosen.append(i)
+            used += length
+    
+    if not chosen:
+        return content[:max_chars]
+    return ' '.join(sentences[i] for i in sorted(chosen))
+
+# Static instructions come first so Ollama can reuse the cached prompt prefix across calls
+_CLUSTERING_PROMPT_PREFIX = """Compare two news articles and determine if they cover the same story/event.
+
+Rate their similarity on a scale of 0-100% where:
+- 100% = Same exact story/event
+- 80-99% = Very similar, likely same story
+- 60-79% = Related but different aspects
+- 40-59% = Somewhat related topics
+- 20-39% = Different but related subjects
+- 0-19% = Completely different
+
+Respond with ONLY a number (0-100), no explanation.
+
+"""
+
+@lru_cache(maxsize=4096)
+def _normalize_identifier(identifier: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace (cached per identifier)"""
+    # Convert to lowercase
+    normalized = identifier.lower().strip()
+    
+    # Remove punctuation except hyphens and spaces
+    if normalized.isascii():
+        normalized = normalized.translate(_ASCII_PUNCT_TABLE)
+    else:
+        normalized = _PUNCT_PATTERN.sub('', normalized)
+    
+    # Remove extra whitespace
+    return ' '.join(normalized.split())
 
 class ClusteringService:
     def __init__(self, db_path="beacon_articles.db"):
         self.db_path = db_path
         self.ollama_url = "http://localhost:11434/api/generate"
         self.model = "gemma:2b"
+        # Keep-alive session so pairwise LLM scoring reuses the Ollama connection
+        self.session = requests.Session()
         self.similarity_index = SimilarityIndex(db_path)
         self.db_pool = get_db_pool(db_path)
         
@@ -36,22 +113,19 @@ class ClusteringService:
         
         # Minimum LLM clustering score to merge
         self.min_llm_score = 80
+        
+        # Candidate comparisons sent to Ollama at the same time
+        self.llm_concurrency = 4
     
     def normalize_identifier(self, identifier: str) -> str:
         """Normalize identifier text for comparison"""
         if not identifier:
             return ""
-        
-        # Convert to lowercase
-        normalized = identifier.lower().strip()
-        
-        # Remove punctuation except hyphens and spaces
-        normalized = re.sub(r'[^\w\s-]', '', normalized)
-        
-        # Remove extra whitespace
-        normalized = ' '.join(normalized.split())
-        
-        return normalized
+        return _normalize_identifier(identifier)
+    
+    def normalize_identifiers(self, identifiers: Dict) -> Dict[str, str]:
+        """Normalize every weighted field of an identifier set"""
+        return {field: self.normalize_identifier(identifiers.get(field, '')) for field in self.weights}
     
     def calculate_similarity(self, text1: str, text2: str) -> float:
         """Calculate similarity between two texts using improved matching"""
@@ -74,8 +148,8 @@ class ClusteringService:
             return 0.0
         
         # Calculate overlap
-        intersection = len(words1.intersection(words2))
-        union = len(words1.union(words2))
+        intersection = len(words1 & words2)
+        union = len(words1) + len(words2) - intersection
         
         if union == 0:
             return 0.0
@@ -84,8 +158,7 @@ class ClusteringService:
         jaccard = intersection / union
         
         # Boost for key words that indicate same topic
-        key_words = ['church', 'shooting', 'michigan', 'gunman', 'attack', 'fire', 'mormon']
-        key_overlap = sum(1 for word in key_words if word in words1 and word in words2)
+        key_overlap = len(_KEY_WORDS & words1 & words2)
         
         # If we have key word overlap, boost the score
         if key_overlap > 0:
@@ -101,14 +174,20 @@ class ClusteringService:
         else:
             return jaccard
     
-    def calculate_weighted_score(self, identifiers1: Dict, identifiers2: Dict) -> Tuple[float, bool]:
+    def calculate_weighted_score(self, identifiers1: Dict, identifiers2: Dict,
+                                 normalized: bool = False) -> Tuple[float, bool]:
         """Calculate weighted similarity score between two identifier sets"""
         total_score = 0.0
         has_high_weight = False
         
+        # Callers comparing one article against many normalize it once up front
+        if not normalized:
+            identifiers1 = self.normalize_identifiers(identifiers1)
+            identifiers2 = self.normalize_identifiers(identifiers2)
+        
         for field, weight in self.weights.items():
-            val1 = self.normalize_identifier(identifiers1.get(field, ''))
-            val2 = self.normalize_identifier(identifiers2.get(field, ''))
+            val1 = identifiers1[field]
+            val2 = identifiers2[field]
             
             if val1 and val2:
                 similarity = self.calculate_similarity(val1, val2)
@@ -123,42 +202,25 @@ class ClusteringService:
     
     def get_llm_clustering_score(self, article1_content: str, article2_content: str) -> float:
         """Get LLM-based clustering score for two articles using direct Gemma"""
-        prompt = f"""Compare these two news articles and determine if they cover the same story/event:
-
-ARTICLE 1:
-{article1_content[:2000]}
+        prompt = _CLUSTERING_PROMPT_PREFIX + f"""ARTICLE 1:
+{_select_salient(article1_content)}
 
 ARTICLE 2:
-{article2_content[:2000]}
-
-Rate their similarity on a scale of 0-100% where:
-- 100% = Same exact story/event
-- 80-99% = Very similar, likely same story
-- 60-79% = Related but different aspects
-- 40-59% = Somewhat related topics
-- 20-39% = Different but related subjects
-- 0-19% = Completely different
+{_select_salient(article2_content)}
 
-Respond with ONLY a number (0-100), no explanation."""
+Similarity (0-100):"""
 
         try:
-            response = requests.post(
-                self.ollama_url,
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.1,
-                        "top_p": 0.9
-                    }
-                },
-                timeout=60
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                response_text = result.get('response', '').strip()
+            result = self._post_ollama({
+                "model": self.model,
+                "prompt": prompt,
+                "stream": False,
+                "options": {
+                    "temperature": 0.1,
+                    "top_p": 0.9
+                }
+            })
+            response_text = result.get('response', '').strip() if result else ''
             
             if response_text:
                 # Extract number from response
@@ -171,8 +233,41 @@ Respond with ONLY a number (0-100), no explanation."""
         
         return 0.0
     
+    def _post_ollama(self, payload: Dict) -> Optional[Dict]:
+        """Post to Ollama, retrying only timeouts, connection errors and 5xx responses"""
+        for attempt in range(OLLAMA_ATTEMPTS):
+            try:
+                response = self.session.post(
+                    self.ollama_url,
+                    data=fast_json.dumps(payload),
+                    headers=fast_json.JSON_HEADERS,
+                    timeout=60
+                )
+                if response.status_code == 200:
+                    return fast_json.loads(response.content)
+                
+                # 4xx means a bad request or unknown model; retrying will not help
+                if response.status_code < 500:
+                    print(f"Ollama request failed with status {response.status_code}")
+                    return None
+                print(f"Ollama attempt {attempt + 1} got status {response.status_code}")
+            except (requests.Timeout, requests.ConnectionError) as e:
+                print(f"Ollama attempt {attempt + 1} failed: {e}")
+            
+            if attempt < OLLAMA_ATTEMPTS - 1:
+                # Jittered exponential backoff
+                time.sleep(OLLAMA_BACKOFF_BASE * 2 ** attempt + random.uniform(0, OLLAMA_BACKOFF_BASE))
+        
+        return None
+    
     def find_potential_clusters(self, new_article_id: int, new_identifiers: Dict) -> List[Tuple[int, float]]:
         """Find existing articles that might cluster with the new article (smart clustering - recent articles only)"""
+        new_normalized = self.normalize_identifiers(new_identifiers)
+        
+        # A match needs a high-weight field on both sides, so skip the scan if this article has none
+        if not any(new_normalized[field] for field, weight in self.weights.items() if weight >= 2):
+            return []
+        
         # Get only recent articles (last 30 days) with identifiers for smart clustering
         thirty_days_ago = datetime.now() - timedelta(days=30)
         rows = self.db_pool.execute_query("""
@@ -187,18 +282,18 @@ Respond with ONLY a number (0-100), no explanation."""
         
         for row in rows:
             article_id = row[0]
-            existing_identifiers = {
+            existing_identifiers = self.normalize_identifiers({
                 'topic_primary': row[1] or '',
                 'topic_secondary': row[2] or '',
                 'entity_primary': row[3] or '',
                 'entity_secondary': row[4] or '',
                 'location_primary': row[5] or '',
                 'event_or_policy': row[6] or ''
-            }
+            })
             
             # Calculate weighted score
             score, has_high_weight = self.calculate_weighted_score(
-                new_identifiers, existing_identifiers
+                new_normalized, existing_identifiers, normalized=True
             )
             
             # Check if meets threshold
@@ -287,47 +382,49 @@ Respond with ONLY a number (0-100), no explanation."""
         
         print(f"Found {len(potential_matches)} potential matches")
         
-        # Get article content for LLM comparison
+        # Get article content and cluster for every candidate up front
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        candidates = []
         for match_article_id, score in potential_matches:
-            print(f"Checking article {match_article_id} (score: {score})")
-            
-            # Get existing article content
-            cursor.execute("SELECT content FROM articles WHERE article_id = ?", (match_article_id,))
+            cursor.execute("SELECT content, cluster_id FROM articles WHERE article_id = ?", (match_article_id,))
             result = cursor.fetchone()
-            
             if result:
-                existing_content = result[0]
-                
-                # Get LLM clustering score
-                llm_score = self.get_llm_clustering_score(article_content, existing_content)
-                print(f"LLM clustering score: {llm_score}%")
+                candidates.append((match_article_id, score, result[0], result[1]))
+        
+        conn.close()
+        
+        # Score candidates in windows of concurrent LLM calls; the first match in order still wins
+        with ThreadPoolExecutor(max_workers=self.llm_concurrency) as executor:
+            for start in range(0, len(candidates), self.llm_concurrency):
+                window = candidates[start:start + self.llm_concurrency]
+                llm_scores = list(executor.map(
+                    lambda candidate: self.get_llm_clustering_score(article_content, candidate[2]),
+                    window
+                ))
                 
-                if llm_score >= self.min_llm_score:
-                    # Check if existing article is already in a cluster
-                    cursor.execute("SELECT cluster_id FROM articles WHERE article_id = ?", (match_article_id,))
-                    cluster_result = cursor.fetchone()
+                for (match_article_id, score, _, existing_cluster_id), llm_score in zip(window, llm_scores):
+                    print(f"Checking article {match_article_id} (score: {score})")
+                    print(f"LLM clustering score: {llm_score}%")
                     
-                    if cluster_result and cluster_result[0]:
-                        # Add to existing cluster
-                        print(f"Adding to existing cluster {cluster_result[0]}")
-                        self.add_to_existing_cluster(article_id, cluster_result[0])
-                        conn.close()
-                        return cluster_result[0]
-                    else:
-                        # Create new cluster
-                        print("Creating new cluster")
-                        cluster_title = f"Cluster {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-                        cluster_summary = f"Articles covering related topics (LLM score: {llm_score}%)"
-                        
-                        cluster_id = self.create_cluster([article_id, match_article_id], 
-                                                        cluster_title, cluster_summary)
-                        conn.close()
-                        return cluster_id
+                    if llm_score >= self.min_llm_score:
+                        # Check if existing article is already in a cluster
+                        if existing_cluster_id:
+                            # Add to existing cluster
+                            print(f"Adding to existing cluster {existing_cluster_id}")
+                            self.add_to_existing_cluster(article_id, existing_cluster_id)
+                            return existing_cluster_id
+                        else:
+                            # Create new cluster
+                            print("Creating new cluster")
+                            cluster_title = f"Cluster {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+                            cluster_summary = f"Articles covering related topics (LLM score: {llm_score}%)"
+                            
+                            cluster_id = self.create_cluster([article_id, match_article_id], 
+                                                            cluster_title, cluster_summary)
+                            return cluster_id
         
-        conn.close()
         print("No clusters created")
         return None
 
@@ -6,7 +6,7 @@ Reuses database connections to avoid overhead.
 
 import sqlite3
 import threading
-from typing import Optional
+from typing import Dict, Optional
 from contextlib import contextmanager
 
 class DatabasePool:
@@ -20,9 +20,16 @@ class DatabasePool:
     def _initialize_pool(self):
         """Initialize the connection pool"""
         for _ in range(self.max_connections):
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            conn.row_factory = sqlite3.Row  # Enable dict-like access
-            self.connections.append(conn)
+            self.connections.append(self._connect())
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a pooled connection"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Enable dict-like access
+        # WAL lets readers run alongside the writer; NORMAL sync is safe with WAL and avoids an fsync per commit
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
     
     @contextmanager
     def get_connection(self):
@@ -34,10 +41,14 @@ class DatabasePool:
                     conn = self.connections.pop()
                 else:
                     # Create new connection if pool is empty
-                    conn = sqlite3.connect(self.db_path, check_same_thread=False)
-                    conn.row_factory = sqlite3.Row
+                    conn = self._connect()
             
             yield conn
+        except Exception:
+            # Don't hand a connection with a half-finished transaction back to the pool
+            if conn:
+                conn.rollback()
+            raise
         finally:
             if conn:
                 with self.lock:
@@ -68,19 +79,20 @@ class DatabasePool:
                 conn.close()
             self.connections.clear()
 
-# Global database pool instance
-_db_pool = None
+# Global database pool instances, one per database file
+_db_pools: Dict[str, DatabasePool] = {}
+_db_pools_lock = threading.Lock()
 
 def get_db_pool(db_path: str = "beacon_articles.db") -> DatabasePool:
-    """Get the global database pool instance"""
-    global _db_pool
-    if _db_pool is None:
-        _db_pool = DatabasePool(db_path)
-    return _db_pool
+    """Get the global database pool instance for db_path"""
+    with _db_pools_lock:
+        if db_path not in _db_pools:
+            _db_pools[db_path] = DatabasePool(db_path)
+        return _db_pools[db_path]
 
 def close_db_pool():
-    """Close the global database pool"""
-    global _db_pool
-    if _db_pool:
-        _db_pool.close_all()
-        _db_pool = None
+    """Close the global database pools"""
+    with _db_pools_lock:
+        for pool in _db_pools.values():
+            pool.close_all()
+        _db_pools.clear()
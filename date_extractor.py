@@ -11,6 +11,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+RELATIVE_DAYS = frozenset({'yesterday', 'today', 'tomorrow'})
+MONTH_WORD_PATTERN = re.compile(r'[a-z]+')
+
 class DateExtractor:
     """Extract and manage dates for articles"""
     
@@ -81,14 +84,15 @@ class DateExtractor:
         """Parse a matched date string into ISO format"""
         try:
             # Handle relative dates
-            if date_str.lower() in ['yesterday', 'today', 'tomorrow']:
+            relative = date_str.lower()
+            if relative in RELATIVE_DAYS:
                 now = datetime.now(timezone.utc)
-                if date_str.lower() == 'yesterday':
+                if relative == 'yesterday':
                     return (now.replace(hour=0, minute=0, second=0, microsecond=0) - 
                            timedelta(days=1)).isoformat()
-                elif date_str.lower() == 'today':
+                elif relative == 'today':
                     return now.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
-                elif date_str.lower() == 'tomorrow':
+                elif relative == 'tomorrow':
                     return (now.replace(hour=0, minute=0, second=0, microsecond=0) + 
                            timedelta(days=1)).isoformat()
             
@@ -111,17 +115,21 @@ class DateExtractor:
                 else:
                     return datetime.fromisoformat(date_str).isoformat()
             
-            # Handle month name formats
-            for month_name, month_num in self.month_names.items():
-                if month_name in date_str.lower():
-                    # Extract year and day
-                    year_match = re.search(r'\b(20\d{2})\b', date_str)
-                    day_match = re.search(r'\b(\d{1,2})\b', date_str)
-                    
-                    if year_match and day_match:
-                        year = int(year_match.group(1))
-                        day = int(day_match.group(1))
-                        return datetime(year, month_num, day, tzinfo=timezone.utc).isoformat()
+            # Handle month name formats (one dict lookup per word)
+            month_num = next(
+                (self.month_names[word] for word in MONTH_WORD_PATTERN.findall(relative)
+                 if word in self.month_names),
+                None
+            )
+            if month_num:
+                # Extract year and day
+                year_match = re.search(r'\b(20\d{2})\b', date_str)
+                day_match = re.search(r'\b(\d{1,2})\b', date_str)
+                
+                if year_match and day_match:
+                    year = int(year_match.group(1))
+                    day = int(day_match.group(1))
+                    return datetime(year, month_num, day, tzinfo=timezone.utc).isoformat()
             
             # Handle MM/DD/YYYY or DD/MM/YYYY format
             if '/' in date_str:
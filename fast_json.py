@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+JSON encoding for Ollama requests and responses.
+Uses orjson when it is installed and falls back to the standard json module.
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+# Headers for requests whose body is already encoded with dumps()
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+def dumps(obj: Any) -> bytes:
+    """Serialize obj to UTF-8 encoded JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Deserialize JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -13,12 +13,31 @@ from typing import Dict, Any, Optional, List
 import logging
 from collections import Counter
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import nltk
 from nltk.tokenize import sent_tokenize, word_tokenize
+from llm_cache import LLMResponseCache
+import fast_json
 
 logger = logging.getLogger(__name__)
 
+# lxml is a much faster BeautifulSoup backend; fall back to the stdlib parser without it
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Text-processing patterns, compiled once
+_BOILERPLATE_CLASS_RE = re.compile(r'(ad|nav|menu|footer|sidebar|social)', re.I)
+_CONTENT_CLASS_RE = re.compile(r'(content|article|story)', re.I)
+_WHITESPACE_RE = re.compile(r'\s+')
+_SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+_LEADING_TITLE_RE = re.compile(r'^([^.!?]{10,100})')
+_SUMMARY_PREFIX_RE = re.compile(r'^(Summary:|Key points:|Excerpt:)', re.IGNORECASE)
+
+# Bump when the excerpt prompts change so stale cached responses are not reused
+PROMPT_TEMPLATE_VERSION = "v1"
+
 class ImprovedExcerptGenerator:
     """Advanced excerpt generator with redundancy reduction and quality improvement"""
     
@@ -27,6 +46,9 @@ class ImprovedExcerptGenerator:
         self.model = model
         self.target_words = 100
         self.tolerance = 0.15  # 15% tolerance
+        # Keep-alive session shared by article fetches and Ollama calls
+        self.session = requests.Session()
+        self.response_cache = LLMResponseCache()
         
         # Download required NLTK data
         try:
@@ -89,7 +111,7 @@ class ImprovedExcerptGenerator:
     def _fetch_article_content(self, url: str) -> Optional[str]:
         """Fetch article content from URL using synchronous requests"""
         try:
-            response = requests.get(url, timeout=30)
+            response = self.session.get(url, timeout=30)
             response.raise_for_status()
             return response.text
         except Exception as e:
@@ -100,39 +122,40 @@ class ImprovedExcerptGenerator:
         """Advanced content cleaning to remove boilerplate and deduplicate"""
         try:
             # Parse HTML and extract main text
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = BeautifulSoup(html_content, HTML_PARSER)
             
             # Remove navigation, footer, ads, and scripts
             for elem in soup(['nav', 'footer', 'script', 'style', 'header', 'aside']):
                 elem.decompose()
             
             # Remove elements with common ad/navigation classes
-            for elem in soup.find_all(class_=re.compile(r'(ad|nav|menu|footer|sidebar|social)', re.I)):
+            for elem in soup.find_all(class_=_BOILERPLATE_CLASS_RE):
                 elem.decompose()
             
             # Extract main content
-            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile(r'(content|article|story)', re.I))
+            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=_CONTENT_CLASS_RE)
             if main_content:
                 text = main_content.get_text(separator=' ', strip=True)
             else:
                 text = soup.get_text(separator=' ', strip=True)
             
             # Clean up whitespace and normalize
-            text = re.sub(r'\s+', ' ', text).strip()
+            text = _WHITESPACE_RE.sub(' ', text).strip()
             
             # Split into sentences and deduplicate
             try:
                 sentences = sent_tokenize(text)
             except:
                 # Fallback to simple sentence splitting if NLTK fails
-                sentences = re.split(r'[.!?]+', text)
+                sentences = _SENTENCE_SPLIT_RE.split(text)
                 sentences = [s.strip() for s in sentences if s.strip()]
             
             if len(sentences) > 10:  # Only deduplicate if we have enough sentences
                 # Compute TF-IDF and cosine similarity for deduplication
                 vectorizer = TfidfVectorizer(stop_words='english', max_features=1000)
                 tfidf_matrix = vectorizer.fit_transform(sentences)
-                similarity_matrix = cosine_similarity(tfidf_matrix)
+                # Rows are L2-normalised, so the sparse product is the cosine similarity
+                similarity_matrix = (tfidf_matrix @ tfidf_matrix.T).tocsr()
                 
                 # Keep sentences with similarity < 0.8
                 unique_sentences = []
@@ -140,10 +163,10 @@ class ImprovedExcerptGenerator:
                 for i, sent in enumerate(sentences):
                     if i not in used_indices and len(sent.strip()) > 20:  # Minimum sentence length
                         unique_sentences.append(sent.strip())
-                        # Mark similar sentences (threshold 0.8)
-                        for j, sim in enumerate(similarity_matrix[i]):
-                            if sim > 0.8 and i != j:
-                                used_indices.add(j)
+                        # Mark similar sentences (threshold 0.8) from the row's non-zeros
+                        start, end = similarity_matrix.indptr[i], similarity_matrix.indptr[i + 1]
+                        row_sims = similarity_matrix.data[start:end]
+                        used_indices.update(similarity_matrix.indices[start:end][row_sims > 0.8].tolist())
                 
                 # Limit to top 10 most relevant sentences
                 return ' '.join(unique_sentences[:10])
@@ -158,7 +181,7 @@ class ImprovedExcerptGenerator:
         """Extract key information with advanced processing"""
         try:
             # Extract title from content (look for common patterns)
-            title_match = re.search(r'^([^.!?]{10,100})', content)
+            title_match = _LEADING_TITLE_RE.search(content)
             title = title_match.group(1).strip() if title_match else "Article"
             
             # Clean and limit content for processing
@@ -177,6 +200,13 @@ class ImprovedExcerptGenerator:
     def _generate_excerpt_with_advanced_llm(self, content: str, original_title: str) -> str:
         """Generate excerpt using improved LLM pipeline with better prompting"""
         try:
+            cache_key = self.response_cache.make_key(
+                "excerpt", self.model, PROMPT_TEMPLATE_VERSION, original_title, content[:800]
+            )
+            cached = self.response_cache.get(cache_key)
+            if cached:
+                return cached
+            
             # Step 1: Extract key points first
             key_points_prompt = f"""Extract 3-5 unique, non-redundant key points from this article. Each point should be a single sentence, concise, and distinct. Avoid boilerplate, repetitive phrases, or irrelevant details.
 
@@ -194,7 +224,11 @@ Key points: {key_points}
 
 Summary:"""
             
-            summary = self._call_ollama(summary_prompt)
+            # Post-processing drops every sentence past max_words, so stop generating once the reply is that long
+            max_words = int(self.target_words * (1 + self.tolerance))
+            summary = self._call_ollama(summary_prompt, stop_after_words=max_words + 1)
+            if summary:
+                self.response_cache.set(cache_key, "excerpt", summary)
             return summary
             
         except Exception as e:
@@ -208,7 +242,7 @@ Summary:"""
             summary = summary.strip()
             
             # Remove common LLM artifacts
-            summary = re.sub(r'^(Summary:|Key points:|Excerpt:)', '', summary, flags=re.IGNORECASE)
+            summary = _SUMMARY_PREFIX_RE.sub('', summary)
             summary = summary.strip()
             
             # Tokenize and count words
@@ -229,7 +263,7 @@ Summary:"""
                     sentences = sent_tokenize(summary)
                 except:
                     # Fallback to simple sentence splitting
-                    sentences = re.split(r'[.!?]+', summary)
+                    sentences = _SENTENCE_SPLIT_RE.split(summary)
                     sentences = [s.strip() for s in sentences if s.strip()]
                 current_words = []
                 for sent in sentences:
@@ -286,7 +320,7 @@ Summary:"""
             try:
                 sentences = sent_tokenize(excerpt)
             except:
-                sentences = re.split(r'[.!?]+', excerpt)
+                sentences = _SENTENCE_SPLIT_RE.split(excerpt)
                 sentences = [s.strip() for s in sentences if s.strip()]
             if len(sentences) > 1:
                 # Calculate sentence length diversity
@@ -294,7 +328,8 @@ Summary:"""
                     sent_lengths = [len(word_tokenize(sent)) for sent in sentences]
                 except:
                     sent_lengths = [len(sent.split()) for sent in sentences]
-                length_variance = sum((l - sum(sent_lengths)/len(sent_lengths))**2 for l in sent_lengths) / len(sent_lengths)
+                mean_length = sum(sent_lengths) / len(sent_lengths)
+                length_variance = sum((l - mean_length)**2 for l in sent_lengths) / len(sent_lengths)
                 diversity_score = min(1.0, length_variance / 100)
             else:
                 diversity_score = 0.5
@@ -313,8 +348,8 @@ Summary:"""
             logger.error(f"❌ Error evaluating quality: {e}")
             return 0.5
     
-    def _call_ollama(self, prompt: str) -> str:
-        """Call Ollama API with improved prompting"""
+    def _call_ollama(self, prompt: str, stop_after_words: Optional[int] = None) -> str:
+        """Call Ollama API with improved prompting; streams and stops early past stop_after_words"""
         try:
             messages = [
                 {
@@ -327,25 +362,48 @@ Summary:"""
                 }
             ]
             
-            response = requests.post(
+            stream = stop_after_words is not None
+            response = self.session.post(
                 f"{self.ollama_url}/api/chat",
-                json={
+                data=fast_json.dumps({
                     "model": self.model,
                     "messages": messages,
-                    "stream": False,
+                    "stream": stream,
                     "options": {
                         "temperature": 0.1,  # Lower temperature for more focused output
-                        "max_tokens": 200
+                        "num_predict": 200   # Ollama's output cap; it ignores max_tokens
                     }
-                },
-                timeout=45
+                }),
+                headers=fast_json.JSON_HEADERS,
+                timeout=45,
+                stream=stream
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                return result.get('message', {}).get('content', '').strip()
-            else:
-                raise Exception(f"Ollama API error: {response.status_code}")
+            with response:
+                if response.status_code != 200:
+                    raise Exception(f"Ollama API error: {response.status_code}")
+                
+                if not stream:
+                    result = fast_json.loads(response.content)
+                    return result.get('message', {}).get('content', '').strip()
+                
+                text = ""
+                # Running count, so each chunk costs only its own length rather than a re-split of the reply
+                word_count = 0
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = fast_json.loads(line)
+                    delta = chunk.get('message', {}).get('content', '')
+                    if delta:
+                        word_count += len(delta.split())
+                        # A chunk that continues the previous chunk's last word doesn't start a new one
+                        if text and not text[-1].isspace() and not delta[0].isspace():
+                            word_count -= 1
+                        text += delta
+                    if chunk.get('done') or word_count > stop_after_words:
+                        break
+                return text.strip()
                 
         except requests.exceptions.Timeout:
             logger.error(f"❌ Ollama API call timed out after 45 seconds.")
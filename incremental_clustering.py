@@ -18,7 +18,7 @@ class IncrementalClustering:
     
     def process_incremental_clustering(self, new_article_id: int) -> Dict:
         """Process clustering for a single new article against recent articles only"""
-        start_time = time.time()
+        start_time = time.monotonic()
         
         # Get new article data
         new_article = self._get_article_by_id(new_article_id)
@@ -37,7 +37,7 @@ class IncrementalClustering:
             return {
                 "status": "no_recent_articles",
                 "comparisons": 0,
-                "processing_time": time.time() - start_time
+                "processing_time": time.monotonic() - start_time
             }
         
         # Find potential matches
@@ -50,7 +50,7 @@ class IncrementalClustering:
             new_article_id, identifiers, potential_matches
         )
         
-        processing_time = time.time() - start_time
+        processing_time = time.monotonic() - start_time
         
         return {
             "status": "completed",
@@ -181,14 +181,14 @@ class IncrementalClustering:
                     score += weight
                     if weight >= 2:
                         has_high_weight = True
-                elif self._calculate_similarity(val1, val2) > 0.8:
+                elif self._calculate_similarity(val1, val2, threshold=0.8) > 0.8:
                     score += weight * 0.5
                     if weight >= 2:
                         has_high_weight = True
         
         return score, has_high_weight
     
-    def _calculate_similarity(self, text1: str, text2: str) -> float:
+    def _calculate_similarity(self, text1: str, text2: str, threshold: float = 0.0) -> float:
         """Calculate text similarity using Jaccard similarity"""
         if not text1 or not text2:
             return 0.0
@@ -196,13 +196,19 @@ class IncrementalClustering:
         words1 = set(text1.lower().split())
         words2 = set(text2.lower().split())
         
-        if not words1 or not words2:
+        n1, n2 = len(words1), len(words2)
+        if not n1 or not n2:
             return 0.0
         
-        intersection = len(words1.intersection(words2))
-        union = len(words1.union(words2))
+        # Jaccard can never exceed min/max of the set sizes, so skip the
+        # set work for pairs that cannot reach the caller's threshold
+        if min(n1, n2) / max(n1, n2) < threshold:
+            return 0.0
+        
+        intersection = len(words1 & words2)
+        union = n1 + n2 - intersection
         
-        return intersection / union if union > 0 else 0.0
+        return intersection / union
     
     def _process_clustering_incremental(self, article_id: int, identifiers: Dict, 
                                        potential_matches: List[Dict]) -> Dict:
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Response cache for LLM generations.
+Stores generated text keyed by model, prompt version and input so repeated work skips Ollama.
+Recent entries are also kept in memory so hot keys skip SQLite too.
+SemanticCache extends this to near-duplicate inputs such as the same story republished elsewhere.
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+# Figures and capitalized names (sentence-initial words aside): word overlap can't tell "12 dead" from
+# "15 dead", so near-duplicate inputs must agree on these exactly
+_NUMBER_RE = re.compile(r'\d+(?:[.,]\d+)*')
+_NAME_RE = re.compile(r"(?<!^)(?<![.!?]\s)\b[A-Z][A-Za-z'-]*")
+
+class LLMResponseCache:
+    def __init__(self, db_path="beacon_articles.db", ttl_seconds: int = 24 * 3600, memory_size: int = 512):
+        self.db_path = db_path
+        self.cache_table = "llm_response_cache"
+        self.ttl_seconds = ttl_seconds
+        self.memory_size = memory_size
+        self.lock = threading.Lock()
+        # cache_key -> (kind, value, created_at), least recently used first
+        self._memory: "OrderedDict[str, Tuple[str, str, int]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._create_cache_table()
+
+    def _create_cache_table(self):
+        """Create cache table for storing LLM responses"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.cache_table} (
+                cache_key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at INTEGER NOT NULL
+            )
+        """)
+
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{self.cache_table}_created_at ON {self.cache_table}(created_at)
+        """)
+
+        conn.commit()
+        conn.close()
+
+    def make_key(self, kind: str, model: str, version: str, *parts: str) -> str:
+        """Build a cache key from the model, prompt version and normalized inputs"""
+        normalized = ' '.join(' '.join(parts).lower().split())
+        return hashlib.sha256(f"{model}|{version}|{kind}|{normalized}".encode()).hexdigest()
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """Get a cached response if present and not expired"""
+        cutoff = int(time.time()) - self.ttl_seconds
+
+        with self.lock:
+            entry = self._memory.get(cache_key)
+            if entry and entry[2] >= cutoff:
+                self._memory.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute(f"""
+            SELECT kind, value, created_at FROM {self.cache_table}
+            WHERE cache_key = ? AND created_at >= ?
+        """, (cache_key, cutoff))
+
+        result = cursor.fetchone()
+        conn.close()
+
+        with self.lock:
+            if result:
+                self._remember(cache_key, result)
+                self.hits += 1
+                return result[1]
+            self.misses += 1
+            return None
+
+    def _remember(self, cache_key: str, entry: Tuple[str, str, int]):
+        """Keep an entry in memory, evicting the least recently used; call with the lock held"""
+        self._memory[cache_key] = entry
+        self._memory.move_to_end(cache_key)
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def set(self, cache_key: str, kind: str, value: str):
+        """Store a response"""
+        with self.lock:
+            self._remember(cache_key, (kind, value, int(time.time())))
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(f"""
+                INSERT OR REPLACE INTO {self.cache_table} (cache_key, kind, value, created_at)
+                VALUES (?, ?, ?, ?)
+            """, (cache_key, kind, value, int(time.time())))
+            conn.commit()
+        except Exception as e:
+            print(f"LLM cache error: {e}")
+        finally:
+            conn.close()
+
+    def invalidate(self, kind: Optional[str] = None, cache_key: Optional[str] = None) -> int:
+        """Drop one entry, every entry of a kind, or the whole cache"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        with self.lock:
+            if cache_key:
+                self._memory.pop(cache_key, None)
+            elif kind:
+                for key in [key for key, entry in self._memory.items() if entry[0] == kind]:
+                    del self._memory[key]
+            else:
+                self._memory.clear()
+
+        if cache_key:
+            cursor.execute(f"DELETE FROM {self.cache_table} WHERE cache_key = ?", (cache_key,))
+        elif kind:
+            cursor.execute(f"DELETE FROM {self.cache_table} WHERE kind = ?", (kind,))
+        else:
+            cursor.execute(f"DELETE FROM {self.cache_table}")
+
+        deleted = cursor.rowcount
+        conn.commit()
+        conn.close()
+
+        return deleted
+
+    def cleanup_expired(self) -> int:
+        """Delete entries older than the TTL"""
+        cutoff = int(time.time()) - self.ttl_seconds
+
+        with self.lock:
+            for key in [key for key, entry in self._memory.items() if entry[2] < cutoff]:
+                del self._memory[key]
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute(f"DELETE FROM {self.cache_table} WHERE created_at < ?", (cutoff,))
+
+        deleted = cursor.rowcount
+        conn.commit()
+        conn.close()
+
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counts since this cache was created"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory)
+            }
+
+class SemanticCache:
+    """Reuse a stored result when a new input's word set nearly matches an earlier one with the same figures and names"""
+
+    def __init__(self, kind: str, db_path="beacon_articles.db", threshold: float = 0.95,
+                 ttl_seconds: int = 24 * 3600, max_entries: int = 2000):
+        self.db_path = db_path
+        self.cache_table = "semantic_cache"
+        self.kind = kind
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self._create_cache_table()
+        self._entries: List[Tuple[FrozenSet[str], FrozenSet[str], str, int]] = self._load_entries()
+
+    def _create_cache_table(self):
+        """Create cache table for storing inputs' word sets and results"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.cache_table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                tokens TEXT NOT NULL,
+                facts TEXT,
+                value TEXT NOT NULL,
+                created_at INTEGER NOT NULL
+            )
+        """)
+
+        # Tables created before facts were stored; their rows have NULL facts and are never loaded
+        cursor.execute(f"PRAGMA table_info({self.cache_table})")
+        if 'facts' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE {self.cache_table} ADD COLUMN facts TEXT")
+
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{self.cache_table}_kind_created_at
+            ON {self.cache_table}(kind, created_at)
+        """)
+
+        conn.commit()
+        conn.close()
+
+    def _load_entries(self) -> List[Tuple[FrozenSet[str], FrozenSet[str], str, int]]:
+        """Load the newest unexpired entries of this kind into memory"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute(f"""
+            SELECT tokens, facts, value, created_at FROM {self.cache_table}
+            WHERE kind = ? AND created_at >= ? AND facts IS NOT NULL
+            ORDER BY created_at DESC LIMIT ?
+        """, (self.kind, int(time.time()) - self.ttl_seconds, self.max_entries))
+
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [(frozenset(tokens.split()), frozenset(facts.split()), value, created_at)
+                for tokens, facts, value, created_at in reversed(rows)]
+
+    @staticmethod
+    def _tokens(text: str) -> FrozenSet[str]:
+        return frozenset(_WORD_RE.findall(text.lower()))
+
+    @staticmethod
+    def _facts(text: str) -> FrozenSet[str]:
+        """Numbers and capitalized names in text"""
+        return frozenset(_NUMBER_RE.findall(text)) | frozenset(_NAME_RE.findall(text))
+
+    def lookup(self, text: str) -> Optional[str]:
+        """Return the stored result for the most similar earlier input above the threshold"""
+        tokens = self._tokens(text)
+        if not tokens:
+            return None
+
+        facts = self._facts(text)
+        size = len(tokens)
+        cutoff = int(time.time()) - self.ttl_seconds
+        best_value = None
+        best_similarity = self.threshold
+
+        # add() appends and trims the list from other threads, so scan a snapshot
+        with self.lock:
+            entries = list(self._entries)
+        
+        for entry_tokens, entry_facts, value, created_at in entries:
+            if created_at < cutoff or entry_facts != facts:
+                continue
+            # Jaccard similarity is at most min/max of the set sizes, so skip entries that can't reach the threshold
+            entry_size = len(entry_tokens)
+            if min(size, entry_size) < self.threshold * max(size, entry_size):
+                continue
+            intersection = len(tokens & entry_tokens)
+            similarity = intersection / (size + entry_size - intersection)
+            if similarity >= best_similarity:
+                best_similarity = similarity
+                best_value = value
+
+        return best_value
+
+    def add(self, text: str, value: str):
+        """Store a result for text"""
+        tokens = self._tokens(text)
+        if not tokens or not value:
+            return
+
+        facts = self._facts(text)
+        created_at = int(time.time())
+        with self.lock:
+            self._entries.append((tokens, facts, value, created_at))
+            if len(self._entries) > self.max_entries:
+                del self._entries[:len(self._entries) - self.max_entries]
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(f"""
+                INSERT INTO {self.cache_table} (kind, tokens, facts, value, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (self.kind, ' '.join(tokens), ' '.join(facts), value, created_at))
+            conn.commit()
+        except Exception as e:
+            print(f"Semantic cache error: {e}")
+        finally:
+            conn.close()
@@ -36,7 +36,9 @@ def setup_logging(log_dir: Optional[str] = None, level: int = logging.INFO) -> N
         return
 
     logs_path = Path(log_dir or "logs")
-    logs_path.mkdir(parents=True, exist_ok=True)
+    # The directory normally exists already; skip the mkdir syscall chain on each process start
+    if not logs_path.is_dir():
+        logs_path.mkdir(parents=True, exist_ok=True)
 
     log_file_path = logs_path / "beacon.log"
 
@@ -6,13 +6,61 @@ Neutral Excerpt Generator - Creates unbiased 100-word summaries from article URL
 import asyncio
 import httpx
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple
 from urllib.parse import urlparse
 import re
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on downloaded HTML per article
+MAX_HTML_BYTES = 2_000_000
+
+# HTML extraction patterns, compiled once
+_TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+_DESCRIPTION_RE = re.compile(r'<meta[^>]*name=["\']description["\'][^>]*content=["\']([^"\']*)["\']', re.IGNORECASE)
+_NON_CONTENT_RE = re.compile(r'<(script|style|nav|header|footer|aside)[^>]*>.*?</\1>', re.IGNORECASE | re.DOTALL)
+_ARTICLE_RE = re.compile(r'<article[^>]*>(.*?)</article>', re.IGNORECASE | re.DOTALL)
+_MAIN_RE = re.compile(r'<main[^>]*>(.*?)</main>', re.IGNORECASE | re.DOTALL)
+_CONTENT_DIV_RE = re.compile(r'<div[^>]*class="[^"]*content[^"]*"[^>]*>(.*?)</div>', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Common navigation and header text (mostly BBC), removed in a single pass
+NAV_PATTERNS = (
+    r'Skip to content',
+    r'Watch Live',
+    r'British Broadcasting Corporation',
+    r'Home News Sport Business',
+    r'Innovation Culture Arts Travel',
+    r'Israel-Gaza War',
+    r'War in Ukraine',
+    r'US & Canada',
+    r'UK UK Politics',
+    r'England N\. Ireland',
+    r'Scotland Scotland Politics',
+    r'Wales Wales Politics',
+    r'Africa Asia China India Australia Europe',
+    r'Latin America Middle East',
+    r'In Pictures BBC InDepth',
+    r'BBC Verify Sport Business',
+    r'Executive Lounge Technology',
+    r'of Business Future of Business',
+    r'Innovation Technology Science & Health',
+    r'Artificial Intelligence AI v the Mind',
+    r'Culture Film & TV Music Art & Design',
+    r'Style Books Entertainment News',
+    r'Arts Arts in Motion Travel Destinations',
+    r'Africa Antarctica Asia Australia and Pacific',
+    r'Caribbean & Bermuda Central America Europe',
+    r'Middle East North America South America',
+    r'World\'s Table Culture & Experiences',
+    r'Adventures The SpeciaList',
+    r'To the Ends of The Earth',
+    r'Earth Natural Wonders Weather & Science',
+)
+_NAV_TEXT_RE = re.compile('|'.join(NAV_PATTERNS), re.IGNORECASE)
+
 class NeutralExcerptGenerator:
     """Generate neutral, factual excerpts from article URLs using LLM"""
     
@@ -39,17 +87,8 @@ class NeutralExcerptGenerator:
             if not article_content:
                 return {"error": "Failed to fetch article content"}
             
-            # Step 2: Extract key information
-            extracted_info = self._extract_article_info(article_content)
-            
-            # Step 3: Generate simple excerpt without LLM (server overload)
-            neutral_excerpt = self._create_simple_excerpt(extracted_info)
-            
-            # Step 4: Clean excerpt
-            clean_excerpt = neutral_excerpt.strip()
-            
-            # Step 5: Check word count and adjust if needed
-            final_excerpt = self._adjust_word_count(clean_excerpt)
+            # Steps 2-5 are CPU-only, so run them off the event loop
+            extracted_info, final_excerpt = await asyncio.to_thread(self._build_excerpt, article_content)
             
             return {
                 "success": True,
@@ -64,98 +103,109 @@ class NeutralExcerptGenerator:
             logger.error(f"❌ Error generating neutral excerpt: {e}")
             return {"error": str(e)}
     
+    def _build_excerpt(self, article_content: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+        """Build the excerpt from fetched content without calling the LLM"""
+        # Step 2: Extract key information
+        extracted_info = self._extract_article_info(article_content)
+        
+        # Step 3: Generate simple excerpt without LLM (server overload)
+        neutral_excerpt = self._create_simple_excerpt(extracted_info)
+        
+        # Step 4: Clean excerpt
+        clean_excerpt = neutral_excerpt.strip()
+        
+        # Step 5: Check word count and adjust if needed
+        final_excerpt = self._adjust_word_count(clean_excerpt)
+        
+        return extracted_info, final_excerpt
+    
+    async def generate_neutral_excerpts(self, urls: List[str], concurrency: int = 20) -> Dict[str, Dict[str, Any]]:
+        """
+        Generate neutral excerpts for several URLs concurrently
+        
+        Args:
+            urls: Article URLs to process (duplicates are fetched once)
+            concurrency: Maximum number of articles processed at the same time
+            
+        Returns:
+            Dict mapping each URL to its generate_neutral_excerpt result
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def _generate(url: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.generate_neutral_excerpt(url)
+        
+        results = await asyncio.gather(*(_generate(url) for url in unique_urls), return_exceptions=True)
+        
+        return {
+            url: {"error": str(result)} if isinstance(result, Exception) else result
+            for url, result in zip(unique_urls, results)
+        }
+    
     async def _fetch_article_content(self, url: str) -> Optional[Dict[str, Any]]:
         """Fetch and parse article content from URL"""
         try:
-            response = await self.client.get(url)
-            response.raise_for_status()
+            # Stream the body and stop at MAX_HTML_BYTES so oversized pages stay bounded
+            async with self.client.stream("GET", url) as response:
+                response.raise_for_status()
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) >= MAX_HTML_BYTES:
+                        break
+                html = body.decode(response.encoding or "utf-8", errors="replace")
             
-            # Basic content extraction (can be enhanced with BeautifulSoup)
-            content = response.text
-            
-            # Extract title from HTML
-            title_match = re.search(r'<title[^>]*>(.*?)</title>', content, re.IGNORECASE | re.DOTALL)
-            title = title_match.group(1).strip() if title_match else ""
-            
-            # Extract meta description
-            desc_match = re.search(r'<meta[^>]*name=["\']description["\'][^>]*content=["\']([^"\']*)["\']', content, re.IGNORECASE)
-            description = desc_match.group(1).strip() if desc_match else ""
-            
-            # Extract main content (improved)
-            # Remove scripts, styles, and other non-content elements
-            content_clean = re.sub(r'<script[^>]*>.*?</script>', '', content, flags=re.IGNORECASE | re.DOTALL)
-            content_clean = re.sub(r'<style[^>]*>.*?</style>', '', content_clean, flags=re.IGNORECASE | re.DOTALL)
-            content_clean = re.sub(r'<nav[^>]*>.*?</nav>', '', content_clean, flags=re.IGNORECASE | re.DOTALL)
-            content_clean = re.sub(r'<header[^>]*>.*?</header>', '', content_clean, flags=re.IGNORECASE | re.DOTALL)
-            content_clean = re.sub(r'<footer[^>]*>.*?</footer>', '', content_clean, flags=re.IGNORECASE | re.DOTALL)
-            content_clean = re.sub(r'<aside[^>]*>.*?</aside>', '', content_clean, flags=re.IGNORECASE | re.DOTALL)
-            
-            # Try to find main article content
-            article_match = re.search(r'<article[^>]*>(.*?)</article>', content_clean, re.IGNORECASE | re.DOTALL)
-            if article_match:
-                content_clean = article_match.group(1)
-            else:
-                # Look for main content div
-                main_match = re.search(r'<main[^>]*>(.*?)</main>', content_clean, re.IGNORECASE | re.DOTALL)
-                if main_match:
-                    content_clean = main_match.group(1)
-                else:
-                    # Look for content div
-                    content_match = re.search(r'<div[^>]*class="[^"]*content[^"]*"[^>]*>(.*?)</div>', content_clean, re.IGNORECASE | re.DOTALL)
-                    if content_match:
-                        content_clean = content_match.group(1)
-            
-            content_clean = re.sub(r'<[^>]+>', ' ', content_clean)  # Remove HTML tags
-            content_clean = re.sub(r'\s+', ' ', content_clean).strip()  # Clean whitespace
-            
-            # Remove common navigation and header text
-            nav_patterns = [
-                r'Skip to content.*?',
-                r'Watch Live.*?',
-                r'British Broadcasting Corporation.*?',
-                r'Home News Sport Business.*?',
-                r'Innovation Culture Arts Travel.*?',
-                r'Israel-Gaza War.*?',
-                r'War in Ukraine.*?',
-                r'US & Canada.*?',
-                r'UK UK Politics.*?',
-                r'England N\. Ireland.*?',
-                r'Scotland Scotland Politics.*?',
-                r'Wales Wales Politics.*?',
-                r'Africa Asia China India Australia Europe.*?',
-                r'Latin America Middle East.*?',
-                r'In Pictures BBC InDepth.*?',
-                r'BBC Verify Sport Business.*?',
-                r'Executive Lounge Technology.*?',
-                r'of Business Future of Business.*?',
-                r'Innovation Technology Science & Health.*?',
-                r'Artificial Intelligence AI v the Mind.*?',
-                r'Culture Film & TV Music Art & Design.*?',
-                r'Style Books Entertainment News.*?',
-                r'Arts Arts in Motion Travel Destinations.*?',
-                r'Africa Antarctica Asia Australia and Pacific.*?',
-                r'Caribbean & Bermuda Central America Europe.*?',
-                r'Middle East North America South America.*?',
-                r'World\'s Table Culture & Experiences.*?',
-                r'Adventures The SpeciaList.*?',
-                r'To the Ends of The Earth.*?',
-                r'Earth Natural Wonders Weather & Science.*?'
-            ]
-            
-            for pattern in nav_patterns:
-                content_clean = re.sub(pattern, '', content_clean, flags=re.IGNORECASE)
-            
-            return {
-                "title": title,
-                "description": description,
-                "content": content_clean[:3000],  # Limit content length for excerpt generation
-                "url": url
-            }
+            # Regex extraction is CPU-bound, so keep it off the event loop
+            return await asyncio.to_thread(self._parse_article_html, url, html)
             
         except Exception as e:
             logger.error(f"❌ Error fetching article content: {e}")
             return None
     
+    def _parse_article_html(self, url: str, content: str) -> Dict[str, Any]:
+        """Extract title, description and main text from article HTML"""
+        # Extract title from HTML
+        title_match = _TITLE_RE.search(content)
+        title = title_match.group(1).strip() if title_match else ""
+        
+        # Extract meta description
+        desc_match = _DESCRIPTION_RE.search(content)
+        description = desc_match.group(1).strip() if desc_match else ""
+        
+        # Extract main content (improved)
+        # Remove scripts, styles, and other non-content elements in one pass
+        content_clean = _NON_CONTENT_RE.sub('', content)
+        
+        # Try to find main article content
+        article_match = _ARTICLE_RE.search(content_clean)
+        if article_match:
+            content_clean = article_match.group(1)
+        else:
+            # Look for main content div
+            main_match = _MAIN_RE.search(content_clean)
+            if main_match:
+                content_clean = main_match.group(1)
+            else:
+                # Look for content div
+                content_match = _CONTENT_DIV_RE.search(content_clean)
+                if content_match:
+                    content_clean = content_match.group(1)
+        
+        content_clean = _TAG_RE.sub(' ', content_clean)  # Remove HTML tags
+        content_clean = _WHITESPACE_RE.sub(' ', content_clean).strip()  # Clean whitespace
+        
+        # Remove common navigation and header text
+        content_clean = _NAV_TEXT_RE.sub('', content_clean)
+        
+        return {
+            "title": title,
+            "description": description,
+            "content": content_clean[:3000],  # Limit content length for excerpt generation
+            "url": url
+        }
+    
     def _extract_article_info(self, article_content: Dict[str, Any]) -> Dict[str, Any]:
         """Extract key information from article content"""
         return {
@@ -188,7 +238,7 @@ class NeutralExcerptGenerator:
         
         # For now, create a simple excerpt without LLM due to server overload
         # Extract first few sentences from content
-        content_sentences = content_preview.split('.')[:3]
+        content_sentences = content_preview.split('.', 3)[:3]
         content_summary = '. '.join(content_sentences).strip()
         
         if content_summary:
@@ -264,7 +314,7 @@ class NeutralExcerptGenerator:
         content_preview = article_info.get("content_preview", "")
         
         # Extract first few sentences from content
-        content_sentences = content_preview.split('.')[:3]
+        content_sentences = content_preview.split('.', 3)[:3]
         content_summary = '. '.join(content_sentences).strip()
         
         if content_summary:
@@ -6,22 +6,82 @@ Neutral Title Generator - Creates unbiased titles from article URLs
 import asyncio
 import httpx
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from urllib.parse import urlparse
 import re
 from datetime import datetime
+import fast_json
 
 logger = logging.getLogger(__name__)
 
+# Page bytes read for title extraction; the title, meta tags and lead text sit near the top
+MAX_HTML_BYTES = 256 * 1024
+
+# HTML-cleaning patterns, compiled once
+_TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+_DESCRIPTION_RE = re.compile(r'<meta[^>]*name=["\']description["\'][^>]*content=["\']([^"\']*)["\']', re.IGNORECASE)
+# Script/style blocks (dropped) or any other tag (replaced by a space), in one scan
+_MARKUP_RE = re.compile(r'<(script|style)[^>]*>.*?</\1>|<[^>]+>', re.IGNORECASE | re.DOTALL)
+_WHITESPACE_RE = re.compile(r'\s+')
+_SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?])\s+')
+# Labels the model sometimes puts before the headline, lowercase; plain prefix checks, no regex pass
+_TITLE_LABELS = ("sure, here is the headline:", "headline:", "title:", "news:")
+# Title-cleaning patterns
+_BOLD_RE = re.compile(r'\*\*(.*?)\*\*')
+_TRAILING_PUNCT_RE = re.compile(r'\s*[.!?]+$')
+# Words kept lowercase after the first word of a title-cased headline
+_SMALL_WORDS = frozenset({'a', 'an', 'and', 'as', 'at', 'but', 'by', 'for', 'from', 'in', 'nor',
+                          'of', 'on', 'or', 'the', 'to', 'up', 'via', 'vs'})
+
+# Static instructions first so every prompt shares a byte-identical prefix Ollama can reuse
+TITLE_PROMPT_PREFIX = """You are a neutral news editor. Create a factual, unbiased headline for the article below.
+
+Requirements:
+- Write a neutral, factual headline (35-80 characters)
+- Avoid opinion words, bias, or sensationalism
+- Use title case
+- No generic words like "News" or "Breaking"
+- Focus on facts, not emotions
+- Be specific and descriptive
+
+"""
+
+def _replace_markup(match: re.Match) -> str:
+    return '' if match.group(1) else ' '
+
+def _strip_label(title: str) -> str:
+    """Drop a leading label such as "Headline:" from a model reply"""
+    lowered = title.lower()
+    for label in _TITLE_LABELS:
+        if lowered.startswith(label):
+            return title[len(label):].lstrip()
+    return title
+
+def _headline_case(title: str) -> str:
+    """Title-case a headline, leaving small words lowercase and acronyms like US intact"""
+    words = title.split()
+    for i, word in enumerate(words):
+        if i > 0 and word.lower() in _SMALL_WORDS:
+            words[i] = word.lower()
+        elif not (word.isupper() and len(word) > 1):
+            # str.title() would also capitalize after apostrophes ("Don'T")
+            words[i] = word[:1].upper() + word[1:].lower()
+    return ' '.join(words)
+
+def _first_sentences(text: str, n: int = 3, max_chars: int = 400) -> str:
+    """The lead sentences of text, capped at max_chars"""
+    return ' '.join(_SENTENCE_BOUNDARY_RE.split(text, maxsplit=n)[:n])[:max_chars]
+
 class NeutralTitleGenerator:
     """Generate neutral, factual titles from article URLs using LLM"""
     
     def __init__(self, ollama_url: str = "http://127.0.0.1:11434", model: str = "llama3.1:8b"):
         self.ollama_url = ollama_url
         self.model = model
-        self.client = httpx.AsyncClient(timeout=60.0)
+        # One pooled client shared by every in-flight fetch and Ollama call
+        self.client = httpx.AsyncClient(timeout=60.0, limits=httpx.Limits(max_keepalive_connections=20))
     
-    def generate_neutral_title(self, url: str) -> Dict[str, Any]:
+    async def generate_neutral_title(self, url: str) -> Dict[str, Any]:
         """
         Generate a neutral title from article URL
         
@@ -58,47 +118,80 @@ class NeutralTitleGenerator:
             logger.error(f"❌ Error generating neutral title: {e}")
             return {"error": str(e)}
     
+    async def generate_neutral_titles(self, urls: List[str], concurrency: int = 16) -> Dict[str, Dict[str, Any]]:
+        """
+        Generate neutral titles for several URLs concurrently
+        
+        Args:
+            urls: Article URLs to process (duplicates are fetched once)
+            concurrency: Maximum number of articles processed (and Ollama requests in flight) at the same time
+            
+        Returns:
+            Dict mapping each URL to its generate_neutral_title result
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def _generate(url: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.generate_neutral_title(url)
+        
+        results = await asyncio.gather(*(_generate(url) for url in unique_urls), return_exceptions=True)
+        
+        return {
+            url: {"error": str(result)} if isinstance(result, Exception) else result
+            for url, result in zip(unique_urls, results)
+        }
+    
     async def _fetch_article_content(self, url: str) -> Optional[Dict[str, Any]]:
         """Fetch and parse article content from URL"""
         try:
-            response = await self.client.get(url)
-            response.raise_for_status()
-            
-            # Basic content extraction (can be enhanced with BeautifulSoup)
-            content = response.text
+            # Stream the body and stop at MAX_HTML_BYTES so oversized pages stay bounded
+            async with self.client.stream("GET", url) as response:
+                response.raise_for_status()
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) >= MAX_HTML_BYTES:
+                        break
+                html = body.decode(response.encoding or "utf-8", errors="replace")
             
-            # Extract title from HTML
-            title_match = re.search(r'<title[^>]*>(.*?)</title>', content, re.IGNORECASE | re.DOTALL)
-            title = title_match.group(1).strip() if title_match else ""
-            
-            # Extract meta description
-            desc_match = re.search(r'<meta[^>]*name=["\']description["\'][^>]*content=["\']([^"\']*)["\']', content, re.IGNORECASE)
-            description = desc_match.group(1).strip() if desc_match else ""
-            
-            # Extract main content (simplified)
-            # Remove scripts, styles, and other non-content elements
-            content_clean = re.sub(r'<script[^>]*>.*?</script>', '', content, flags=re.IGNORECASE | re.DOTALL)
-            content_clean = re.sub(r'<style[^>]*>.*?</style>', '', content_clean, flags=re.IGNORECASE | re.DOTALL)
-            content_clean = re.sub(r'<[^>]+>', ' ', content_clean)  # Remove HTML tags
-            content_clean = re.sub(r'\s+', ' ', content_clean).strip()  # Clean whitespace
-            
-            return {
-                "title": title,
-                "description": description,
-                "content": content_clean[:2000],  # Limit content length
-                "url": url
-            }
+            # Regex extraction is CPU-bound, so keep it off the event loop
+            return await asyncio.to_thread(self._parse_article_html, url, html)
             
         except Exception as e:
             logger.error(f"❌ Error fetching article content: {e}")
             return None
     
+    def _parse_article_html(self, url: str, content: str) -> Dict[str, Any]:
+        """Extract title, description and main text from article HTML"""
+        # Extract title from HTML
+        title_match = _TITLE_RE.search(content)
+        title = title_match.group(1).strip() if title_match else ""
+        
+        # Extract meta description
+        desc_match = _DESCRIPTION_RE.search(content)
+        description = desc_match.group(1).strip() if desc_match else ""
+        
+        # Extract main content (simplified)
+        # Remove scripts, styles, and other non-content elements
+        content_clean = _MARKUP_RE.sub(_replace_markup, content)  # Remove scripts, styles and HTML tags
+        content_clean = _WHITESPACE_RE.sub(' ', content_clean).strip()  # Clean whitespace
+        
+        return {
+            "title": title,
+            "description": description,
+            "content": content_clean[:2000],  # Limit content length
+            "url": url
+        }
+    
     def _extract_article_info(self, article_content: Dict[str, Any]) -> Dict[str, Any]:
         """Extract key information from article content"""
         return {
             "original_title": article_content.get("title", ""),
             "description": article_content.get("description", ""),
-            "content_preview": article_content.get("content", "")[:500],  # First 500 chars
+            # The lead is enough for a headline, and prompt-eval time grows with every token
+            "content_preview": _first_sentences(article_content.get("content", "")),
             "source_domain": urlparse(article_content.get("url", "")).netloc
         }
     
@@ -123,20 +216,10 @@ class NeutralTitleGenerator:
         content_preview = article_info.get("content_preview", "")
         source_domain = article_info.get("source_domain", "")
         
-        prompt = f"""You are a neutral news editor. Create a factual, unbiased headline for this article.
-
-Original Title: {original_title}
+        prompt = f"""{TITLE_PROMPT_PREFIX}Original Title: {original_title}
 Source: {source_domain}
 Content Preview: {content_preview}
 
-Requirements:
-- Write a neutral, factual headline (35-80 characters)
-- Avoid opinion words, bias, or sensationalism
-- Use title case
-- No generic words like "News" or "Breaking"
-- Focus on facts, not emotions
-- Be specific and descriptive
-
 Return only the headline:"""
 
         return prompt
@@ -157,20 +240,21 @@ Return only the headline:"""
             
             response = await self.client.post(
                 f"{self.ollama_url}/api/chat",
-                json={
+                content=fast_json.dumps({
                     "model": self.model,
                     "messages": messages,
                     "stream": False,
                     "options": {
                         "temperature": 0.0,  # Deterministic for consistency
-                        "max_tokens": 100,   # Short response
+                        "num_predict": 32,   # Short response; headlines fit well inside 32 tokens
                         "stop": ["Here's", "Sure,", "Let me", "I'll", "Here are"]
                     }
-                }
+                }),
+                headers=fast_json.JSON_HEADERS
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = fast_json.loads(response.content)
                 return result.get('message', {}).get('content', '').strip()
             else:
                 raise Exception(f"Ollama API error: {response.status_code}")
@@ -186,15 +270,17 @@ Return only the headline:"""
         
         # Remove common prefixes/suffixes
         title = title.strip()
-        title = re.sub(r'^(Headline:|Title:|News:)\s*', '', title, flags=re.IGNORECASE)
-        title = re.sub(r'\s*[.!?]+$', '', title)  # Remove trailing punctuation
+        # Unwrap bold first so a "**Headline:**" label is seen by the label check
+        title = _BOLD_RE.sub(r'\1', title)
+        title = _strip_label(title)
+        title = _TRAILING_PUNCT_RE.sub('', title)  # Remove trailing punctuation
         
         # Ensure proper length
         if len(title) > 100:
             title = title[:97] + "..."
         
         # Capitalize properly
-        title = title.title()
+        title = _headline_case(title)
         
         return title
 
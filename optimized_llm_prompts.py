@@ -110,12 +110,18 @@ def assess_content_quality(content: str) -> Dict[str, Any]:
         quality_score -= 1
     
     # Content structure check
-    if not any(word in content.lower() for word in ['news', 'article', 'story', 'report']):
+    content_lower = content.lower()
+    if not any(word in content_lower for word in ('news', 'article', 'story', 'report')):
         issues.append("No news indicators")
         quality_score -= 1
     
-    # Proper noun check
-    proper_nouns = len([word for word in content.split() if word[0].isupper()])
+    # Proper noun check (stops counting once the threshold is reached)
+    proper_nouns = 0
+    for word in content.split():
+        if word[0].isupper():
+            proper_nouns += 1
+            if proper_nouns >= 5:
+                break
     if proper_nouns < 5:
         issues.append("Few proper nouns")
         quality_score -= 1
@@ -9,10 +9,18 @@ import json
 from typing import Dict, List, Tuple
 import re
 
+# Words that indicate the same topic when both identifiers contain them
+_KEY_WORDS = frozenset({'church', 'shooting', 'michigan', 'gunman', 'attack', 'fire', 'mormon'})
+
+# Upper bound on pairs memoised in process before the memo is reset
+MAX_MEMORY_PAIRS = 50000
+
 class SimilarityIndex:
     def __init__(self, db_path="beacon_articles.db"):
         self.db_path = db_path
         self.index_table = "similarity_index"
+        # In-process memo of scores already read from or written to the index
+        self._memory: Dict[Tuple[str, str], float] = {}
         self._create_index_table()
     
     def _create_index_table(self):
@@ -57,8 +65,8 @@ class SimilarityIndex:
         if not words1 or not words2:
             return 0.0
         
-        intersection = len(words1.intersection(words2))
-        union = len(words1.union(words2))
+        intersection = len(words1 & words2)
+        union = len(words1) + len(words2) - intersection
         
         if union == 0:
             return 0.0
@@ -66,8 +74,7 @@ class SimilarityIndex:
         jaccard = intersection / union
         
         # Boost for key words that indicate same topic
-        key_words = ['church', 'shooting', 'michigan', 'gunman', 'attack', 'fire', 'mormon']
-        key_overlap = sum(1 for word in key_words if word in words1 and word in words2)
+        key_overlap = len(_KEY_WORDS & words1 & words2)
         
         # If we have key word overlap, boost the score
         if key_overlap > 0:
@@ -92,6 +99,12 @@ class SimilarityIndex:
         norm1 = self._normalize_identifier(identifier1)
         norm2 = self._normalize_identifier(identifier2)
         
+        # Pairs are symmetric, so memoise under a canonical order
+        memory_key = (norm1, norm2) if norm1 <= norm2 else (norm2, norm1)
+        cached = self._memory.get(memory_key)
+        if cached is not None:
+            return cached
+        
         # Check if we have this pair in index
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
@@ -106,6 +119,7 @@ class SimilarityIndex:
         
         if result:
             conn.close()
+            self._remember(memory_key, result[0])
             return result[0]
         
         # Calculate and store similarity
@@ -120,8 +134,15 @@ class SimilarityIndex:
         conn.commit()
         conn.close()
         
+        self._remember(memory_key, similarity)
         return similarity
     
+    def _remember(self, key: Tuple[str, str], similarity: float):
+        """Store a score in the in-process memo"""
+        if len(self._memory) >= MAX_MEMORY_PAIRS:
+            self._memory.clear()
+        self._memory[key] = similarity
+    
     def batch_calculate_similarities(self, identifiers: List[str]) -> Dict[Tuple[str, str], float]:
         """Calculate similarities for a batch of identifiers"""
         similarities = {}
@@ -29,23 +29,30 @@ class SimilarityPreFilter:
             'politics': 1,
             'international': 3
         }
+        
+        # Distinct keywords across all categories, scanned once per text
+        self._all_keywords = frozenset(
+            word for words in self.keyword_categories.values() for word in words
+        )
     
     def extract_keywords(self, text: str) -> Dict[str, List[str]]:
         """Extract keywords from text for each category"""
         text_lower = text.lower()
+        present = {word for word in self._all_keywords if word in text_lower}
         keywords = {}
         
         for category, words in self.keyword_categories.items():
-            found_words = [word for word in words if word in text_lower]
+            found_words = [word for word in words if word in present]
             keywords[category] = found_words
         
         return keywords
     
     def calculate_quick_similarity(self, text1: str, text2: str) -> float:
         """Calculate quick similarity score based on keyword overlap"""
-        keywords1 = self.extract_keywords(text1)
-        keywords2 = self.extract_keywords(text2)
-        
+        return self._keyword_similarity(self.extract_keywords(text1), self.extract_keywords(text2))
+    
+    def _keyword_similarity(self, keywords1: Dict[str, List[str]], keywords2: Dict[str, List[str]]) -> float:
+        """Weighted per-category overlap between two extracted keyword sets"""
         total_score = 0.0
         total_weight = 0.0
         
@@ -75,9 +82,10 @@ class SimilarityPreFilter:
     def filter_articles(self, target_text: str, candidate_texts: List[str], threshold: float = 0.3) -> List[Tuple[int, float]]:
         """Filter candidate articles based on quick similarity"""
         filtered_candidates = []
+        target_keywords = self.extract_keywords(target_text)
         
         for i, candidate_text in enumerate(candidate_texts):
-            quick_score = self.calculate_quick_similarity(target_text, candidate_text)
+            quick_score = self._keyword_similarity(target_keywords, self.extract_keywords(candidate_text))
             
             if quick_score >= threshold:
                 filtered_candidates.append((i, quick_score))
@@ -5,10 +5,13 @@ Simple Beacon Web Interface - Working version with database backend
 
 from flask import Flask, render_template_string, request, jsonify
 import json
+import sqlite3
 from datetime import datetime, timezone
 from beacon_database import BeaconDatabase
 from sync_title_generator import SyncNeutralTitleGenerator
 from sync_excerpt_generator import SyncNeutralExcerptGenerator
+from article_fetch import fetch_article
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
 # Configure logging
@@ -22,6 +25,9 @@ db = BeaconDatabase("beacon_articles.db")
 title_generator = SyncNeutralTitleGenerator()
 excerpt_generator = SyncNeutralExcerptGenerator()
 
+# Title and excerpt generation are independent Ollama calls, so they run side by side
+generator_executor = ThreadPoolExecutor(max_workers=4)
+
 # Simple HTML template
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -507,8 +513,6 @@ def index():
 def get_articles():
     """Get all articles and clusters from database"""
     try:
-        import sqlite3
-        
         # Get all clusters with their data
         conn = sqlite3.connect('beacon_articles.db')
         conn.row_factory = sqlite3.Row
@@ -591,10 +595,14 @@ def process_article():
         else:
             # Generate neutral title and excerpt from URL
             logger.info(f"🤖 Generating neutral title and excerpt for URL: {url}")
-            import asyncio
             
-            # Generate neutral title
-            title_result = title_generator.generate_neutral_title(url)
+            # Fetch the page once, then generate neutral title and excerpt concurrently from it
+            prefetched = fetch_article(title_generator.session, url)
+            title_future = generator_executor.submit(title_generator.generate_neutral_title, url, prefetched)
+            excerpt_future = generator_executor.submit(excerpt_generator.generate_neutral_excerpt, url, prefetched)
+            title_result = title_future.result()
+            excerpt_result = excerpt_future.result()
+            
             if title_result.get('success'):
                 neutral_title = title_result['neutral_title']
                 logger.info(f"✅ Generated neutral title: {neutral_title}")
@@ -602,11 +610,9 @@ def process_article():
                 neutral_title = title  # Fallback to original title
                 logger.warning(f"⚠️ Failed to generate neutral title, using original: {title}")
             
-            # Generate neutral excerpt
-            excerpt_result = excerpt_generator.generate_neutral_excerpt(url)
             if excerpt_result.get('success'):
                 neutral_excerpt = excerpt_result['neutral_excerpt']
-                logger.info(f"✅ Generated neutral excerpt ({excerpt_result['word_count']} words): {neutral_excerpt[:100]}...")
+                logger.info("✅ Generated neutral excerpt (%s words): %.100s...", excerpt_result['word_count'], neutral_excerpt)
             else:
                 neutral_excerpt = excerpt  # Fallback to original excerpt
                 logger.warning(f"⚠️ Failed to generate neutral excerpt, using original: {excerpt}")
@@ -4,15 +4,84 @@ Synchronous neutral excerpt generator for Flask compatibility
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import re
-from bs4 import BeautifulSoup
+import time
 from urllib.parse import urlparse
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional
 import logging
+from article_fetch import fetch_article
+import fast_json
+from llm_cache import LLMResponseCache, SemanticCache
 
 logger = logging.getLogger(__name__)
 
+# Bump when the excerpt prompts change so stale cached responses are not reused
+PROMPT_TEMPLATE_VERSION = "v2"
+
+# Label the model sometimes puts before a summary
+_SUMMARY_PREFIX_RE = re.compile(r'^(Summary:|Key points:)', re.IGNORECASE)
+
+# Numbered list item prefix in the extraction stage's output
+_NUMBERED_ITEM_RE = re.compile(r'^\d+\.\s*')
+MAX_GROK_EXCERPTS = 6
+
+# Key Grok criteria for sentence scoring
+GROK_INDICATORS = (
+    'warn', 'warned', 'warning', 'alienate', 'abandon', 'fracture', 'division',
+    'polling', 'survey', 'review', 'policy', 'climate', 'net zero', 'emissions',
+    'said', 'stated', 'noted', 'emphasized', 'highlighted', 'urged', 'called',
+    'percentage', '%', 'voters', 'election', 'party', 'liberal', 'conservative'
+)
+# One scan finds every indicator: at each position the lookahead captures the longest indicator
+# starting there, and _GROK_INDICATOR_IMPLIES adds the indicators inside it ('warning' holds 'warn')
+_GROK_INDICATOR_RE = re.compile(
+    '(?=(' + '|'.join(map(re.escape, sorted(GROK_INDICATORS, key=len, reverse=True))) + '))'
+)
+_GROK_INDICATOR_IMPLIES = {
+    indicator: frozenset(other for other in GROK_INDICATORS if other in indicator)
+    for indicator in GROK_INDICATORS
+}
+
+# Boilerplate terms that cost a sentence its bonus, matched as one alternation
+GROK_BOILERPLATE = ('share', 'save', 'follow', 'subscribe', 'newsletter', 'photograph', 'view image')
+_GROK_BOILERPLATE_RE = re.compile('|'.join(map(re.escape, GROK_BOILERPLATE)))
+# Shorter list used by the simple fallback summary
+SIMPLE_BOILERPLATE = ('share', 'save', 'follow')
+
+# Sentence terminators; a run of them ends one sentence
+_SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+
+def _iter_sentences(text: str, min_length: int = 20):
+    """Yield stripped sentences longer than min_length in one pass over text"""
+    last = 0
+    for match in _SENTENCE_SPLIT_RE.finditer(text):
+        sentence = text[last:match.start()].strip()
+        last = match.end()
+        if len(sentence) > min_length:
+            yield sentence
+    tail = text[last:].strip()
+    if len(tail) > min_length:
+        yield tail
+
+def _parse_numbered_excerpts(text: str) -> list:
+    """Parse the excerpts from a numbered list, skipping items too short to be useful"""
+    excerpts = []
+    for line in text.split('\n'):
+        line = line.strip()
+        item_match = _NUMBERED_ITEM_RE.match(line)
+        if item_match:
+            excerpt = line[item_match.end():].strip()
+            if excerpt and len(excerpt) > 15:
+                excerpts.append(excerpt)
+    return excerpts
+
+def _has_enough_excerpts(text: str) -> bool:
+    """Whether the completed lines of a streamed list already hold every excerpt we keep"""
+    complete, _, _ = text.rpartition('\n')
+    return len(_parse_numbered_excerpts(complete)) >= MAX_GROK_EXCERPTS
+
 class SyncNeutralExcerptGenerator:
     """Generate neutral, factual excerpts from article URLs using synchronous requests"""
     
@@ -21,17 +90,25 @@ class SyncNeutralExcerptGenerator:
         self.model = model
         self.target_words = 100
         self.tolerance = 0.15  # 15% tolerance
+        # Keep-alive session shared by article fetches and Ollama calls
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.response_cache = LLMResponseCache()
+        # Near-duplicate articles (the same story from another outlet) reuse an earlier excerpt
+        self.semantic_cache = SemanticCache("excerpt")
     
-    def generate_neutral_excerpt(self, url: str) -> Dict[str, Any]:
-        """Generate a neutral excerpt from article URL"""
+    def generate_neutral_excerpt(self, url: str, prefetched: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Generate a neutral excerpt from article URL, or from a page already fetched with article_fetch"""
         try:
-            # Step 1: Fetch article content from URL
-            article_content = self._fetch_article_content(url)
-            if not article_content:
+            # Step 1: Fetch article content from URL unless the caller already has it
+            article = prefetched or fetch_article(self.session, url)
+            if not article:
                 return {"success": False, "error": "Failed to fetch article content"}
             
             # Step 2: Extract key information
-            extracted_info = self._extract_article_info(article_content)
+            extracted_info = self._extract_article_info(article)
             
             # Step 3: Generate excerpt using LLM
             neutral_excerpt = self._generate_excerpt_with_llm(
@@ -59,67 +136,44 @@ class SyncNeutralExcerptGenerator:
             logger.error(f"❌ Error generating neutral excerpt: {e}")
             return {"success": False, "error": str(e)}
     
-    def _fetch_article_content(self, url: str) -> Optional[str]:
-        """Fetch article content from URL using synchronous requests"""
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            return response.text
-        except Exception as e:
-            logger.error(f"❌ Error fetching article content: {e}")
-            return None
-    
-    def _extract_article_info(self, content: str) -> Dict[str, Any]:
-        """Extract key information from article content"""
-        soup = BeautifulSoup(content, 'html.parser')
-        
-        # Extract title
-        title = soup.title.string if soup.title else ""
-        if not title:
-            og_title = soup.find("meta", property="og:title")
-            title = og_title["content"] if og_title else ""
-        
-        # Extract meta description
-        desc_match = re.search(r'<meta[^>]*name=["\']description["\'][^>]*content=["\']([^"\']*)["\']', content, re.IGNORECASE)
-        description = desc_match.group(1).strip() if desc_match else ""
-        
-        # Extract main content (improved)
-        content_clean = re.sub(r'<script[^>]*>.*?</script>', '', content, flags=re.IGNORECASE | re.DOTALL)
-        content_clean = re.sub(r'<style[^>]*>.*?</style>', '', content_clean, flags=re.IGNORECASE | re.DOTALL)
-        content_clean = re.sub(r'<nav[^>]*>.*?</nav>', '', content_clean, flags=re.IGNORECASE | re.DOTALL)
-        content_clean = re.sub(r'<header[^>]*>.*?</header>', '', content_clean, flags=re.IGNORECASE | re.DOTALL)
-        content_clean = re.sub(r'<footer[^>]*>.*?</footer>', '', content_clean, flags=re.IGNORECASE | re.DOTALL)
-        content_clean = re.sub(r'<aside[^>]*>.*?</aside>', '', content_clean, flags=re.IGNORECASE | re.DOTALL)
-        
-        # Try to find main article content
-        article_match = re.search(r'<article[^>]*>(.*?)</article>', content_clean, re.IGNORECASE | re.DOTALL)
-        if article_match:
-            content_clean = article_match.group(1)
-        else:
-            main_match = re.search(r'<main[^>]*>(.*?)</main>', content_clean, re.IGNORECASE | re.DOTALL)
-            if main_match:
-                content_clean = main_match.group(1)
-        
-        content_clean = re.sub(r'<[^>]+>', ' ', content_clean)
-        content_clean = re.sub(r'\s+', ' ', content_clean).strip()
-        
+    def _extract_article_info(self, article: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract key information from a fetched article"""
         return {
-            "original_title": title,
-            "description": description,
-            "content": content_clean[:500],  # Limit for excerpt generation
+            "original_title": article["title"],
+            "description": article["description"],
+            "content": article["cleaned"][:500],  # Limit for excerpt generation
             "source_domain": ""
         }
     
     def _generate_excerpt_with_llm(self, content: str, original_title: str) -> str:
-        """Generate neutral excerpt using Grok-style two-stage approach"""
+        """Generate neutral excerpt in one Grok-style call, falling back to the two-stage approach"""
         try:
-            # Try Grok-style LLM approach first
+            # Reuse the LLM excerpt from an earlier run on the same content
+            cache_key = self.response_cache.make_key("excerpt", self.model, PROMPT_TEMPLATE_VERSION, content)
+            cached = self.response_cache.get(cache_key)
+            if cached:
+                logger.info("✅ Using cached LLM excerpt")
+                return cached
+            
+            similar = self.semantic_cache.lookup(content)
+            if similar:
+                logger.info("✅ Using cached excerpt from a near-duplicate article")
+                return similar
+            
+            # Try Grok-style LLM approach first: one call, then the two-stage pipeline if it falls short
             logger.info("🤖 Attempting Grok-style LLM pipeline...")
-            excerpts = self._extract_unique_excerpts_grok(content)
-            if excerpts:
-                summary = self._synthesize_neutral_summary_grok(excerpts)
-                if summary:
-                    return self._post_process_summary_grok(summary)
+            summary = self._generate_excerpt_single_stage_grok(content)
+            if not summary:
+                logger.info("🔄 Single-stage summary too short, trying two-stage pipeline...")
+                excerpts = self._extract_unique_excerpts_grok(content)
+                if excerpts:
+                    summary = self._synthesize_neutral_summary_grok(excerpts)
+            
+            if summary:
+                summary = self._post_process_summary_grok(summary)
+                self.response_cache.set(cache_key, "excerpt", summary)
+                self.semantic_cache.add(content, summary)
+                return summary
             
             # Fallback to intelligent extraction
             logger.info("🔄 Falling back to intelligent Grok-style extraction...")
@@ -129,6 +183,38 @@ class SyncNeutralExcerptGenerator:
             logger.error(f"❌ Error in Grok-style generation: {e}")
             return self._intelligent_extraction_grok(content, original_title)
     
+    def _generate_excerpt_single_stage_grok(self, content: str) -> str:
+        """Extract the key facts and synthesize the summary in a single call; empty if the summary is too short"""
+        try:
+            # Truncate if too long
+            if len(content) > 2000:
+                content = content[:2000] + "..."
+            
+            prompt = f"Write a neutral 100-word summary of this article. Be factual and objective:\n\n{content}"
+            
+            messages = [
+                {"role": "system", "content": "Extract key facts, then write a neutral 100-word summary. Output only the summary."},
+                {"role": "user", "content": prompt}
+            ]
+            
+            # Same early stop as stage 2
+            min_words = int(self.target_words * (1 - self.tolerance))
+            max_words = int(self.target_words * (1 + self.tolerance))
+            summary = self._stream_chat(
+                messages, {"temperature": 0.1, "num_predict": 150}, timeout=20,
+                should_stop=lambda text: len(text.split()) > max_words + 2
+            )
+            
+            if summary is None:
+                return ""
+            summary = _SUMMARY_PREFIX_RE.sub('', summary.strip()).strip()
+            # Long output is trimmed by post-processing; short output gets the two-stage pipeline instead
+            return summary if len(summary.split()) >= min_words else ""
+                
+        except Exception as e:
+            logger.error(f"❌ Grok single-stage generation failed: {e}")
+            return ""
+    
     def _extract_unique_excerpts_grok(self, content: str) -> list:
         """Stage 1: Extract unique excerpts using Grok approach"""
         try:
@@ -143,31 +229,14 @@ class SyncNeutralExcerptGenerator:
                 {"role": "user", "content": prompt}
             ]
             
-            response = requests.post(
-                f"{self.ollama_url}/api/chat",
-                json={
-                    "model": self.model,
-                    "messages": messages,
-                    "stream": False,
-                    "options": {"temperature": 0.1, "max_tokens": 300}
-                },
-                timeout=20  # Shorter timeout
+            # Stop reading once the list holds every excerpt we keep
+            content_text = self._stream_chat(
+                messages, {"temperature": 0.1, "num_predict": 300}, timeout=20,
+                should_stop=_has_enough_excerpts
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                content_text = result.get('message', {}).get('content', '').strip()
-                
-                # Parse numbered list
-                excerpts = []
-                for line in content_text.split('\n'):
-                    line = line.strip()
-                    if re.match(r'^\d+\.', line):
-                        excerpt = re.sub(r'^\d+\.\s*', '', line).strip()
-                        if excerpt and len(excerpt) > 15:
-                            excerpts.append(excerpt)
-                
-                return excerpts[:6]
+            if content_text is not None:
+                return _parse_numbered_excerpts(content_text)[:MAX_GROK_EXCERPTS]
             return []
                 
         except Exception as e:
@@ -186,21 +255,16 @@ class SyncNeutralExcerptGenerator:
                 {"role": "user", "content": prompt}
             ]
             
-            response = requests.post(
-                f"{self.ollama_url}/api/chat",
-                json={
-                    "model": self.model,
-                    "messages": messages,
-                    "stream": False,
-                    "options": {"temperature": 0.1, "max_tokens": 150}
-                },
-                timeout=20
+            # Words past max_words are cut by _post_process_summary_grok, so stop reading once there are
+            # more than that even after a two-word "Key points:" prefix is stripped
+            max_words = int(self.target_words * (1 + self.tolerance))
+            summary = self._stream_chat(
+                messages, {"temperature": 0.1, "num_predict": 150}, timeout=20,
+                should_stop=lambda text: len(text.split()) > max_words + 2
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                summary = result.get('message', {}).get('content', '').strip()
-                return re.sub(r'^(Summary:|Key points:)', '', summary, flags=re.IGNORECASE).strip()
+            if summary is not None:
+                return _SUMMARY_PREFIX_RE.sub('', summary.strip()).strip()
             return ""
                 
         except Exception as e:
@@ -211,13 +275,14 @@ class SyncNeutralExcerptGenerator:
         """Intelligent extraction using Grok-style scoring"""
         try:
             # Split into sentences
-            sentences = re.split(r'[.!?]+', content)
-            sentences = [s.strip() for s in sentences if s.strip() and len(s.strip()) > 20]
+            sentences = _iter_sentences(content)
             
-            # Score sentences based on Grok's criteria
+            # Score sentences based on Grok's criteria; the title's words are the same for every sentence
+            title_words = set(title.lower().split())
+            title_word_count = max(1, len(title_words))
             scored_sentences = []
             for sentence in sentences:
-                score = self._score_sentence_grok_style(sentence, title)
+                score = self._score_sentence_grok_style(sentence, title_words, title_word_count)
                 if score > 0.3:  # Only keep high-scoring sentences
                     scored_sentences.append((sentence, score))
             
@@ -236,29 +301,22 @@ class SyncNeutralExcerptGenerator:
             logger.error(f"❌ Intelligent extraction failed: {e}")
             return self._create_simple_summary_grok(content, title)
     
-    def _score_sentence_grok_style(self, sentence: str, title: str) -> float:
+    def _score_sentence_grok_style(self, sentence: str, title_words: set, title_word_count: int) -> float:
         """Score sentences using Grok's approach - focus on warnings, divisions, quotes, polling, reviews"""
         score = 0.0
         
-        # Key Grok criteria
-        grok_indicators = [
-            'warn', 'warned', 'warning', 'alienate', 'abandon', 'fracture', 'division',
-            'polling', 'survey', 'review', 'policy', 'climate', 'net zero', 'emissions',
-            'said', 'stated', 'noted', 'emphasized', 'highlighted', 'urged', 'called',
-            'percentage', '%', 'voters', 'election', 'party', 'liberal', 'conservative'
-        ]
-        
+        # Key Grok criteria: each indicator found anywhere in the sentence scores once
         sentence_lower = sentence.lower()
-        for indicator in grok_indicators:
-            if indicator in sentence_lower:
-                score += 0.1
+        found = set()
+        for match in _GROK_INDICATOR_RE.finditer(sentence_lower):
+            found |= _GROK_INDICATOR_IMPLIES[match.group(1)]
+        score += 0.1 * len(found)
         
         # Title relevance
-        title_words = set(title.lower().split())
         sentence_words = set(sentence_lower.split())
         common_words = title_words.intersection(sentence_words)
         if common_words:
-            score += 0.2 * (len(common_words) / len(title_words))
+            score += 0.2 * (len(common_words) / title_word_count)
         
         # Length preference (medium-length sentences)
         word_count = len(sentence.split())
@@ -268,16 +326,21 @@ class SyncNeutralExcerptGenerator:
             score += 0.1
         
         # Avoid boilerplate
-        boilerplate = ['share', 'save', 'follow', 'subscribe', 'newsletter', 'photograph', 'view image']
-        if not any(bp in sentence_lower for bp in boilerplate):
+        if not _GROK_BOILERPLATE_RE.search(sentence_lower):
             score += 0.1
         
         return score
     
     def _create_simple_summary_grok(self, content: str, title: str) -> str:
         """Simple fallback summary"""
-        sentences = content.split('.')[:5]
-        meaningful = [s.strip() for s in sentences if len(s.strip()) > 30 and not any(word in s.lower() for word in ['share', 'save', 'follow'])]
+        sentences = content.split('.', 5)[:5]
+        meaningful = []
+        for sentence in sentences:
+            sentence = sentence.strip()
+            if len(sentence) > 30:
+                sentence_lower = sentence.lower()
+                if not any(bp in sentence_lower for bp in SIMPLE_BOILERPLATE):
+                    meaningful.append(sentence)
         
         if meaningful:
             summary = '. '.join(meaningful[:3]) + '.'
@@ -295,17 +358,17 @@ class SyncNeutralExcerptGenerator:
             max_words = int(self.target_words * (1 + self.tolerance))
             
             if word_count > max_words:
-                # Truncate by sentences
-                sentences = re.split(r'[.!?]+', summary)
-                sentences = [s.strip() for s in sentences if s.strip()]
-                current_words = []
-                for sent in sentences:
-                    sent_words = sent.split()
-                    if len(current_words) + len(sent_words) <= max_words:
-                        current_words.extend(sent_words)
+                # Truncate by sentences; with whitespace collapsed, a sentence has count(' ') + 1 words
+                kept = []
+                current_count = 0
+                for sent in _iter_sentences(' '.join(words), min_length=0):
+                    sent_count = sent.count(' ') + 1
+                    if current_count + sent_count <= max_words:
+                        kept.append(sent)
+                        current_count += sent_count
                     else:
                         break
-                summary = ' '.join(current_words)
+                summary = ' '.join(kept)
                 if summary and not summary.endswith('.'):
                     summary += '.'
             
@@ -318,6 +381,43 @@ class SyncNeutralExcerptGenerator:
             logger.error(f"❌ Post-processing failed: {e}")
             return summary
     
+    def _stream_chat(self, messages: list, options: Dict[str, Any], timeout: int,
+                     should_stop: Callable[[str], bool]) -> Optional[str]:
+        """Stream an Ollama chat reply, closing the connection once should_stop accepts the text so far
+        or timeout seconds have passed"""
+        # The request timeout only bounds each read of a streamed reply, so enforce the total here
+        deadline = time.monotonic() + timeout
+        response = self.session.post(
+            f"{self.ollama_url}/api/chat",
+            data=fast_json.dumps({
+                "model": self.model,
+                "messages": messages,
+                "stream": True,
+                "options": options
+            }),
+            headers=fast_json.JSON_HEADERS,
+            timeout=timeout,
+            stream=True
+        )
+        
+        with response:
+            if response.status_code != 200:
+                logger.error(f"❌ Ollama API error: {response.status_code}")
+                return None
+            
+            text = ""
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = fast_json.loads(line)
+                text += chunk.get('message', {}).get('content', '')
+                if chunk.get('done') or should_stop(text):
+                    break
+                if time.monotonic() > deadline:
+                    logger.warning(f"Ollama stream passed its {timeout}s limit; using the reply so far")
+                    break
+            return text
+    
     def _call_ollama(self, prompt: str) -> str:
         """Call Ollama API synchronously"""
         try:
@@ -332,22 +432,23 @@ class SyncNeutralExcerptGenerator:
                 }
             ]
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.ollama_url}/api/chat",
-                json={
+                data=fast_json.dumps({
                     "model": self.model,
                     "messages": messages,
                     "stream": False,
                     "options": {
                         "temperature": 0.0,
-                        "max_tokens": 150
+                        "num_predict": 150
                     }
-                },
+                }),
+                headers=fast_json.JSON_HEADERS,
                 timeout=30
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = fast_json.loads(response.content)
                 return result.get('message', {}).get('content', '').strip()
             else:
                 raise Exception(f"Ollama API error: {response.status_code}")
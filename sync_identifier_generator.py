@@ -5,47 +5,77 @@ Generates: topic_primary, topic_secondary, entity_primary, entity_secondary, loc
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import re
 import sys
 import os
+import logging
+from article_fetch import fetch_article
+import fast_json
+from llm_cache import LLMResponseCache
+
+logger = logging.getLogger(__name__)
+
+# Bump when the identifier prompt changes so stale cached responses are not reused
+PROMPT_TEMPLATE_VERSION = "v1"
+
+# Static instructions first, article last, so Ollama can reuse the cached prompt prefix
+IDENTIFIER_PROMPT_PREFIX = """Extract from the article below:
+
+**Main topic:** [2-4 words]
+**Secondary topic:** [2-4 words]  
+**Main person/org:** [2-4 words]
+**Secondary entity:** [2-4 words]
+**Main location:** [2-4 words]
+**Specific event:** [2-4 words]
+
+Article: """
+
+# Preambles the model puts before the identifiers
+IDENTIFIER_PREFIXES = (
+    "Sure, here are the key identifiers:",
+    "Here are the key identifiers:",
+    "Key identifiers:",
+    "Identifiers:",
+    "The key identifiers are:",
+    "Based on the article, the key identifiers are:"
+)
+_IDENTIFIER_PREFIX_RE = re.compile(r'^(?:(?:' + '|'.join(map(re.escape, IDENTIFIER_PREFIXES)) + r')\s*)+')
+
+# Response labels and the fields they fill, keyed lowercase for case-insensitive lookup
+IDENTIFIER_LABELS = {
+    'main topic': 'topic_primary',
+    'secondary topic': 'topic_secondary',
+    'main person/organization': 'entity_primary',
+    'secondary entity': 'entity_secondary',
+    'location_primary': 'location_primary',
+    'specific event': 'event_or_policy'
+}
+# Every "**Label:** answer" line in one pass
+_IDENTIFIER_FIELD_RE = re.compile(
+    r'\*\*(?P<label>' + '|'.join(map(re.escape, IDENTIFIER_LABELS)) + r'):\*\*\s*(?P<value>[^\n]+)',
+    re.IGNORECASE
+)
 
 class SyncIdentifierGenerator:
     def __init__(self):
         self.ollama_url = "http://localhost:11434/api/generate"
         self.model = "gemma:2b"
+        self.response_cache = LLMResponseCache()
+        # Keep-alive session shared by article fetches and Ollama calls
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         
-    def _fetch_article_content(self, url):
-        """Fetch article content from URL"""
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            return response.text
-        except Exception as e:
-            print(f"Error fetching article content: {e}")
-            return None
-    
     def _clean_identifier(self, identifier):
         """Clean and normalize identifier text"""
         if not identifier:
             return ""
         
-        # Remove common prefixes
-        prefixes_to_remove = [
-            "Sure, here are the key identifiers:",
-            "Here are the key identifiers:",
-            "Key identifiers:",
-            "Identifiers:",
-            "The key identifiers are:",
-            "Based on the article, the key identifiers are:"
-        ]
-        
-        cleaned = identifier.strip()
-        for prefix in prefixes_to_remove:
-            if cleaned.startswith(prefix):
-                cleaned = cleaned[len(prefix):].strip()
-        
-        return cleaned
+        # Remove common prefixes in one anchored match
+        return _IDENTIFIER_PREFIX_RE.sub('', identifier.strip(), count=1).strip()
     
     def _parse_json_response(self, response_text):
         """Parse response and extract 6 typed identifiers"""
@@ -53,40 +83,31 @@ class SyncIdentifierGenerator:
             # Clean the response
             cleaned = self._clean_identifier(response_text)
             
-            # Parse the format: **1. Main topic:** Church service, etc.
-            result = {}
-            
-            # Map the label format to our fields
-            field_mapping = {
-                'Main topic': 'topic_primary',
-                'Secondary topic': 'topic_secondary', 
-                'Main person/organization': 'entity_primary',
-                'Secondary entity': 'entity_secondary',
-                'Location_primary': 'location_primary',
-                'Specific event': 'event_or_policy'
-            }
-            
-            for label, field in field_mapping.items():
-                # Pattern to match "**Label:** answer"
-                pattern = rf'\*\*{re.escape(label)}:\*\*\s*([^\n]+)'
-                match = re.search(pattern, cleaned, re.IGNORECASE)
-                if match:
-                    value = match.group(1).strip()
+            # Parse the format: **Main topic:** Church service, etc. in one scan
+            result = dict.fromkeys(IDENTIFIER_LABELS.values(), '')
+            found = set()
+            for match in _IDENTIFIER_FIELD_RE.finditer(cleaned):
+                field = IDENTIFIER_LABELS[match.group('label').lower()]
+                if field not in found:
+                    found.add(field)
                     # Remove any remaining markdown
-                    value = re.sub(r'\*\*', '', value)
-                    result[field] = value
-                    print(f"Found {field}: {value}")
-                else:
-                    result[field] = ''
-                    print(f"Not found {field}")
+                    result[field] = match.group('value').strip().replace('**', '')
+            
+            # The per-field report only matters when debugging
+            if logger.isEnabledFor(logging.DEBUG):
+                for field, value in result.items():
+                    if field in found:
+                        logger.debug("Found %s: %s", field, value)
+                    else:
+                        logger.debug("Not found %s", field)
             
             # Validate that we have meaningful content
             if any(result.values()):
                 return result
                     
         except Exception as e:
-            print(f"Parsing error: {e}")
-            print(f"Raw response: {response_text}")
+            logger.error(f"❌ Parsing error: {e}")
+            logger.debug("Raw response: %s", response_text)
         
         # Fallback: return empty structure
         return {
@@ -98,34 +119,36 @@ class SyncIdentifierGenerator:
             'event_or_policy': ''
         }
     
-    def generate_identifiers(self, url):
-        """Generate 6 typed identifiers for an article"""
-        print(f"Generating identifiers for: {url}")
+    def generate_identifiers(self, url, prefetched=None):
+        """Generate 6 typed identifiers for an article, reusing a page already fetched with article_fetch"""
+        logger.info(f"🤖 Generating identifiers for: {url}")
         
-        # Fetch article content
-        content = self._fetch_article_content(url)
-        if not content:
-            print("Failed to fetch article content")
+        # Fetch article content unless the caller already has it
+        article = prefetched or fetch_article(self.session, url)
+        if not article:
+            logger.error("❌ Failed to fetch article content")
             return None
+        content = article["raw"]
         
         # Truncate content if too long
         if len(content) > 2000:
             content = content[:2000] + "..."
         
         # Optimized prompt - shorter and more direct
-        prompt = f"""Extract from: {content}
-
-**Main topic:** [2-4 words]
-**Secondary topic:** [2-4 words]  
-**Main person/org:** [2-4 words]
-**Secondary entity:** [2-4 words]
-**Main location:** [2-4 words]
-**Specific event:** [2-4 words]"""
+        prompt = IDENTIFIER_PROMPT_PREFIX + content
+        
+        # Same prompt as an earlier run: parse the stored model output instead of calling Ollama
+        cache_key = self.response_cache.make_key("identifiers", self.model, PROMPT_TEMPLATE_VERSION, prompt)
+        cached = self.response_cache.get(cache_key)
+        if cached:
+            identifiers = self._parse_json_response(cached)
+            logger.info("✅ Generated identifiers (cached): %s", identifiers)
+            return identifiers
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.ollama_url,
-                json={
+                data=fast_json.dumps({
                     "model": self.model,
                     "prompt": prompt,
                     "stream": False,
@@ -133,25 +156,28 @@ class SyncIdentifierGenerator:
                         "temperature": 0.3,
                         "top_p": 0.9
                     }
-                },
+                }),
+                headers=fast_json.JSON_HEADERS,
                 timeout=120  # Increased timeout
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = fast_json.loads(response.content)
                 response_text = result.get('response', '')
+                if response_text:
+                    self.response_cache.set(cache_key, "identifiers", response_text)
                 
                 # Parse the JSON response
                 identifiers = self._parse_json_response(response_text)
                 
-                print(f"Generated identifiers: {identifiers}")
+                logger.info("✅ Generated identifiers: %s", identifiers)
                 return identifiers
             else:
-                print(f"Ollama API error: {response.status_code}")
+                logger.error(f"❌ Ollama API error: {response.status_code}")
                 return None
                 
         except Exception as e:
-            print(f"Error generating identifiers: {e}")
+            logger.error(f"❌ Error generating identifiers: {e}")
             return None
 
 def main():
@@ -164,6 +190,8 @@ def main():
     identifiers = generator.generate_identifiers(url)
     
     if identifiers:
+        # Subprocess callers parse this line and the key: value lines below
+        print(f"Generated identifiers: {identifiers}")
         print("\n=== GENERATED IDENTIFIERS ===")
         for key, value in identifiers.items():
             print(f"{key}: {value}")
@@ -4,38 +4,150 @@ Synchronous neutral title generator for Flask compatibility
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import os
 import re
-from bs4 import BeautifulSoup
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import logging
+from article_fetch import FETCH_HEADERS, fetch_article
+import fast_json
+from llm_cache import LLMResponseCache, SemanticCache
 
 logger = logging.getLogger(__name__)
 
+# Headlines need little model; OLLAMA_TITLE_MODEL swaps in a smaller or more quantized tag
+# (e.g. qwen2.5:0.5b-instruct-q4_K_M) without a code change. A Modelfile with
+# PARAMETER num_ctx 1024 keeps its KV cache small, since title prompts are short.
+DEFAULT_TITLE_MODEL = "gemma:2b"
+
+# How long Ollama keeps the model loaded after a call; its 5 minute default means a
+# multi-second reload after a quiet spell
+OLLAMA_KEEP_ALIVE = "30m"
+
+# Bump when the title prompt changes so stale cached responses are not reused
+PROMPT_TEMPLATE_VERSION = "v2"
+
+# Static instructions go in the system message, which is byte-identical on every call,
+# so Ollama reuses its evaluated prefix and only the short user message is new
+TITLE_SYSTEM_PROMPT = "You are a neutral news editor. Create a neutral headline for the article the user describes. Return only the headline."
+
+# Labels the model sometimes puts before the headline, lowercase; plain prefix checks, no regex pass
+_TITLE_LABELS = ("sure, here is the headline:", "headline:", "title:", "news:")
+# Title-cleaning patterns, compiled once
+_BOLD_RE = re.compile(r'\*\*(.*?)\*\*')
+_TRAILING_PUNCT_RE = re.compile(r'\s*[.!?]+$')
+
+# Original titles that can be used as-is: headline length, no clickbait wording, no site-name suffix
+NEUTRAL_TITLE_MIN_CHARS = 35
+NEUTRAL_TITLE_MAX_CHARS = 80
+_SENSATIONAL_RE = re.compile(r"\b(shocking|breaking|you won't believe|exclusive|bombshell|must see|jaw-dropping)\b", re.IGNORECASE)
+_SITE_SUFFIX_RE = re.compile(r'\s[|\u2013\u2014-]\s')
+
+def _strip_label(title: str) -> str:
+    """Drop a leading label such as "Headline:" from a model reply"""
+    lowered = title.lower()
+    for label in _TITLE_LABELS:
+        if lowered.startswith(label):
+            return title[len(label):].lstrip()
+    return title
+
+# Streamed reply length at which reading stops even without a line break; headlines run well under this
+MAX_STREAMED_TITLE_CHARS = 120
+
+def _complete_headline(text: str) -> Optional[str]:
+    """The first finished line of a streamed reply that holds more than a bare label, if one has arrived"""
+    # The last line may still be growing
+    for line in text.lstrip().split('\n')[:-1]:
+        line = _BOLD_RE.sub(r'\1', line).strip()
+        if _strip_label(line).strip():
+            return line
+    return None
+
 class SyncNeutralTitleGenerator:
     """Generate neutral, factual titles from article URLs using synchronous requests"""
     
-    def __init__(self, ollama_url: str = "http://127.0.0.1:11434", model: str = "gemma:2b"):
+    def __init__(self, ollama_url: str = "http://127.0.0.1:11434", model: Optional[str] = None):
         self.ollama_url = ollama_url
-        self.model = model
+        self.model = model or os.environ.get("OLLAMA_TITLE_MODEL", DEFAULT_TITLE_MODEL)
+        # Greedy decoding makes the reply a function of the prompt, which is what lets it be cached
+        self.temperature = 0.0
+        self.response_cache = LLMResponseCache()
+        # The same story from another outlet has a near-identical title and description, so reuse its title;
+        # the cache only matches inputs with the same figures and names, so an updated toll gets a new title
+        self.semantic_cache = SemanticCache("title")
+        # Keep-alive session shared by article fetches and Ollama calls
+        self.session = requests.Session()
+        self.session.headers.update(FETCH_HEADERS)
+        # Retry dropped connections briefly before a fetch or Ollama call gives up
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=Retry(total=2, backoff_factor=0.3))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Articles whose original title was used without calling Ollama
+        self.lock = threading.Lock()
+        self.titles_generated = 0
+        self.originals_kept = 0
+        # Load the model in the background so the first title doesn't wait for it
+        threading.Thread(target=self.warm_up, daemon=True).start()
     
-    def generate_neutral_title(self, url: str) -> Dict[str, Any]:
-        """Generate a neutral title from article URL"""
+    def warm_up(self):
+        """Ask Ollama to load the title model; a prompt-less request loads it without generating"""
         try:
-            # Step 1: Fetch article content from URL
-            article_content = self._fetch_article_content(url)
-            if not article_content:
+            self.session.post(
+                f"{self.ollama_url}/api/generate",
+                data=fast_json.dumps({"model": self.model, "keep_alive": OLLAMA_KEEP_ALIVE}),
+                headers=fast_json.JSON_HEADERS,
+                timeout=120
+            )
+        except Exception as e:
+            logger.warning(f"Ollama warm-up failed: {e}")
+    
+    def generate_neutral_title(self, url: str, prefetched: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Generate a neutral title from article URL, or from a page already fetched with article_fetch"""
+        try:
+            # Step 1: Fetch article content from URL unless the caller already has it
+            article = prefetched or fetch_article(self.session, url)
+            if not article:
                 return {"error": "Failed to fetch article content"}
             
             # Step 2: Extract key information
-            extracted_info = self._extract_article_info(article_content)
+            extracted_info = self._extract_article_info(article)
             
-            # Step 3: Generate neutral title using LLM
-            neutral_title = self._generate_title_with_llm(extracted_info)
+            # Step 3: Keep an original title that is already a plain headline
+            original_title = extracted_info.get("original_title", "")
+            already_neutral = self._is_already_neutral(original_title)
+            with self.lock:
+                self.titles_generated += 1
+                if already_neutral:
+                    self.originals_kept += 1
+            if already_neutral:
+                logger.info("✅ Original title is already neutral; skipping generation")
+                return {
+                    "success": True,
+                    "neutral_title": original_title,
+                    "original_url": url,
+                    "extracted_info": extracted_info,
+                    "generated_at": datetime.now().isoformat()
+                }
             
-            # Step 4: Validate and clean title
-            clean_title = self._validate_and_clean_title(neutral_title, extracted_info.get("original_title", ""))
+            # Step 4: Reuse the title of a near-duplicate article if there is one
+            semantic_text = f"{original_title} {extracted_info.get('description', '')}"
+            clean_title = self.semantic_cache.lookup(semantic_text)
+            if clean_title:
+                logger.info("✅ Using cached title from a near-duplicate article")
+            else:
+                # Step 5: Generate neutral title using LLM
+                neutral_title = self._generate_title_with_llm(extracted_info)
+                
+                # Step 6: Validate and clean title
+                clean_title = self._validate_and_clean_title(neutral_title, original_title)
+                if clean_title != original_title:
+                    self.semantic_cache.add(semantic_text, clean_title)
             
             return {
                 "success": True,
@@ -49,54 +161,38 @@ class SyncNeutralTitleGenerator:
             logger.error(f"❌ Error generating neutral title: {e}")
             return {"error": str(e)}
     
-    def _fetch_article_content(self, url: str) -> Optional[str]:
-        """Fetch article content from URL using synchronous requests"""
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            return response.text
-        except Exception as e:
-            logger.error(f"❌ Error fetching article content: {e}")
-            return None
+    def generate_neutral_titles(self, urls: List[str], max_workers: int = 8) -> Dict[str, Dict[str, Any]]:
+        """Generate neutral titles for several URLs concurrently, mapping each URL to its result"""
+        unique_urls = list(dict.fromkeys(urls))
+        # Fetches and Ollama calls are network-bound, so threads overlap them; the session's pool is thread-safe
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(self.generate_neutral_title, unique_urls)
+            return dict(zip(unique_urls, results))
     
-    def _extract_article_info(self, content: str) -> Dict[str, Any]:
-        """Extract key information from article content"""
-        soup = BeautifulSoup(content, 'html.parser')
-        
-        # Extract title
-        title = soup.title.string if soup.title else ""
-        if not title:
-            og_title = soup.find("meta", property="og:title")
-            title = og_title["content"] if og_title else ""
-        
-        # Extract meta description
-        desc_match = re.search(r'<meta[^>]*name=["\']description["\'][^>]*content=["\']([^"\']*)["\']', content, re.IGNORECASE)
-        description = desc_match.group(1).strip() if desc_match else ""
-        
-        # Extract main content
-        content_clean = re.sub(r'<script[^>]*>.*?</script>', '', content, flags=re.IGNORECASE | re.DOTALL)
-        content_clean = re.sub(r'<style[^>]*>.*?</style>', '', content_clean, flags=re.IGNORECASE | re.DOTALL)
-        content_clean = re.sub(r'<nav[^>]*>.*?</nav>', '', content_clean, flags=re.IGNORECASE | re.DOTALL)
-        content_clean = re.sub(r'<header[^>]*>.*?</header>', '', content_clean, flags=re.IGNORECASE | re.DOTALL)
-        content_clean = re.sub(r'<footer[^>]*>.*?</footer>', '', content_clean, flags=re.IGNORECASE | re.DOTALL)
-        content_clean = re.sub(r'<aside[^>]*>.*?</aside>', '', content_clean, flags=re.IGNORECASE | re.DOTALL)
-        
-        # Try to find main article content
-        article_match = re.search(r'<article[^>]*>(.*?)</article>', content_clean, re.IGNORECASE | re.DOTALL)
-        if article_match:
-            content_clean = article_match.group(1)
-        else:
-            main_match = re.search(r'<main[^>]*>(.*?)</main>', content_clean, re.IGNORECASE | re.DOTALL)
-            if main_match:
-                content_clean = main_match.group(1)
-        
-        content_clean = re.sub(r'<[^>]+>', ' ', content_clean)
-        content_clean = re.sub(r'\s+', ' ', content_clean).strip()
-        
+    def stats(self) -> Dict[str, Any]:
+        """How often the original title was kept instead of generating one"""
+        with self.lock:
+            return {
+                "titles_generated": self.titles_generated,
+                "originals_kept": self.originals_kept,
+                "originals_kept_rate": self.originals_kept / self.titles_generated if self.titles_generated else 0.0
+            }
+    
+    def _is_already_neutral(self, title: str) -> bool:
+        """Whether an original title can be used as-is"""
+        title = title.strip()
+        if not NEUTRAL_TITLE_MIN_CHARS <= len(title) <= NEUTRAL_TITLE_MAX_CHARS:
+            return False
+        if title.isupper() or title.endswith(('!', '?')):
+            return False
+        return not _SENSATIONAL_RE.search(title) and not _SITE_SUFFIX_RE.search(title)
+    
+    def _extract_article_info(self, article: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract key information from a fetched article"""
         return {
-            "original_title": title,
-            "description": description,
-            "content": content_clean[:2000],  # Limit for title generation
+            "original_title": article["title"],
+            "description": article["description"],
+            "content": article["cleaned"][:2000],  # Limit for title generation
             "source_domain": ""
         }
     
@@ -113,39 +209,68 @@ class SyncNeutralTitleGenerator:
     def _create_title_prompt(self, article_info: Dict[str, Any]) -> str:
         """Create prompt for neutral title generation"""
         original_title = article_info.get("original_title", "")
-        content_preview = article_info.get("content", "")[:1000]
         
-        prompt = f"""Create a neutral headline for: {original_title}. Return only the headline:"""
+        prompt = f"Original Title: {original_title}"
         
         return prompt
     
     def _call_ollama(self, prompt: str) -> str:
-        """Call Ollama API synchronously"""
+        """Call Ollama API synchronously, reusing the stored reply for a prompt seen before"""
+        cache_key = None
+        if self.temperature == 0:
+            cache_key = self.response_cache.make_key("title", self.model, PROMPT_TEMPLATE_VERSION, prompt)
+            cached = self.response_cache.get(cache_key)
+            if cached:
+                return cached
+        
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.ollama_url}/api/chat",
-                json={
+                data=fast_json.dumps({
                     "model": self.model,
                     "messages": [
+                        {
+                            "role": "system",
+                            "content": TITLE_SYSTEM_PROMPT
+                        },
                         {
                             "role": "user",
                             "content": prompt
                         }
                     ],
-                    "stream": False,
+                    "stream": True,
+                    "keep_alive": OLLAMA_KEEP_ALIVE,
                     "options": {
-                        "temperature": 0.0,
-                        "max_tokens": 100
+                        "temperature": self.temperature,
+                        # Ollama's output cap; headlines fit well inside 32 tokens
+                        "num_predict": 32
                     }
-                },
-                timeout=60
+                }),
+                headers=fast_json.JSON_HEADERS,
+                timeout=60,
+                stream=True
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                return result.get('message', {}).get('content', '').strip()
-            else:
-                raise Exception(f"Ollama API error: {response.status_code}")
+            with response:
+                if response.status_code != 200:
+                    raise Exception(f"Ollama API error: {response.status_code}")
+                
+                # Headlines are one line, so stop reading (and close the connection) once a complete one arrives
+                text = ""
+                headline = None
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = fast_json.loads(line)
+                    text += chunk.get('message', {}).get('content', '')
+                    headline = _complete_headline(text)
+                    if chunk.get('done') or headline or len(text) > MAX_STREAMED_TITLE_CHARS:
+                        break
+            
+            text = (headline or text).strip()
+            if text and cache_key:
+                self.response_cache.set(cache_key, "title", text)
+            return text
                 
         except Exception as e:
             logger.error(f"❌ Error calling Ollama: {e}")
@@ -159,11 +284,28 @@ class SyncNeutralTitleGenerator:
         
         # Clean the title
         title = title.strip()
-        title = re.sub(r'^(Headline:|Title:|News:)\s*', '', title, flags=re.IGNORECASE)
-        title = re.sub(r'\s*[.!?]+$', '', title)
+        # Unwrap bold first so a "**Headline:**" label is seen by the label check
+        title = _BOLD_RE.sub(r'\1', title)
+        title = _strip_label(title)
+        title = _TRAILING_PUNCT_RE.sub('', title)
         
         # Ensure it starts with a capital letter
         if title and title[0].islower():
             title = title[0].upper() + title[1:]
         
         return title
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python3 sync_title_generator.py <url> [<url> ...]")
+        sys.exit(1)
+    
+    generator = SyncNeutralTitleGenerator()
+    results = generator.generate_neutral_titles(sys.argv[1:])
+    
+    # One title per line, in argument order
+    for url in sys.argv[1:]:
+        print(results[url].get("neutral_title", ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test article parsing with selectolax and with the regex fallback
+"""
+
+import pytest
+
+import article_fetch
+from article_fetch import MAX_HTML_CHARS, parse_article
+
+ARTICLE_PAGE = """<html><head>
+<title>Floods sweep northern province &amp; towns</title>
+<meta name="description" content="Rescue teams search for missing residents.">
+<script>var tracking = "not article text";</script>
+</head><body>
+<nav>Home News Sport</nav>
+<article><h1>Floods</h1><p>Rescue teams   searched overnight.</p><aside>Related stories</aside></article>
+<footer>Copyright</footer>
+</body></html>"""
+
+@pytest.fixture(autouse=True)
+def clear_parse_cache():
+    article_fetch._parse_capped_page.cache_clear()
+    yield
+    article_fetch._parse_capped_page.cache_clear()
+
+@pytest.fixture
+def regex_only(monkeypatch):
+    monkeypatch.setattr(article_fetch, "HTMLParser", None)
+
+@pytest.fixture
+def with_selectolax(monkeypatch):
+    lexbor = pytest.importorskip("selectolax.lexbor")
+    monkeypatch.setattr(article_fetch, "HTMLParser", lexbor.LexborHTMLParser)
+
+@pytest.mark.parametrize("parser", ["regex_only", "with_selectolax"])
+def test_parse_article_fields(parser, request):
+    request.getfixturevalue(parser)
+    article = parse_article(ARTICLE_PAGE)
+
+    assert article["title"] == "Floods sweep northern province & towns"
+    assert article["description"] == "Rescue teams search for missing residents."
+    assert article["cleaned"] == "Floods Rescue teams searched overnight."
+    assert article["raw"] == ARTICLE_PAGE
+
+@pytest.mark.parametrize("parser", ["regex_only", "with_selectolax"])
+def test_parse_article_og_title_fallback(parser, request):
+    request.getfixturevalue(parser)
+    page = ('<html><head><meta content="Budget passes Senate" property="og:title"></head>'
+            '<body><main><p>The vote was close.</p></main></body></html>')
+    article = parse_article(page)
+
+    assert article["title"] == "Budget passes Senate"
+    assert article["cleaned"] == "The vote was close."
+
+def test_regex_fallback_uses_body_without_content_element(regex_only):
+    page = "<html><body><header>Site name</header><p>Only paragraph.</p><script>x = 1"
+    article = parse_article(page)
+
+    # The header is stripped, and so is the script the page cuts off before its closing tag
+    assert article["cleaned"] == "Only paragraph."
+
+def test_parse_article_caps_page_length(regex_only):
+    page = "<html><body><p>" + "word " * MAX_HTML_CHARS + "</p></body></html>"
+    assert len(parse_article(page)["raw"]) == MAX_HTML_CHARS
+
+def test_parse_article_reuses_result_for_identical_page(regex_only):
+    assert parse_article(ARTICLE_PAGE) is parse_article(ARTICLE_PAGE)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test the LLM response and semantic caches
+"""
+
+import os
+import sqlite3
+import tempfile
+
+import llm_cache
+from llm_cache import LLMResponseCache, SemanticCache
+
+def _db_path():
+    return os.path.join(tempfile.mkdtemp(), "cache_test.db")
+
+FLOOD_12 = ("Death toll rises to 12 after floods sweep northern province, officials say. "
+            "Rescue teams are searching for people still missing as rivers keep rising. "
+            "Emergency crews evacuated several villages overnight while heavy rain continued, "
+            "and forecasters warned that more storms could arrive later this week.")
+FLOOD_15 = FLOOD_12.replace("12", "15")
+
+def test_response_cache_hit_and_miss():
+    cache = LLMResponseCache(db_path=_db_path())
+    key = cache.make_key("title", "gemma:2b", "v1", "Some   Prompt")
+
+    assert cache.get(key) is None
+    cache.set(key, "title", "A neutral title")
+    assert cache.get(key) == "A neutral title"
+    # Keys ignore case and repeated whitespace in the inputs
+    assert cache.make_key("title", "gemma:2b", "v1", "some prompt") == key
+    assert cache.make_key("title", "gemma:2b", "v2", "some prompt") != key
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+def test_response_cache_reads_back_entries_evicted_from_memory():
+    db_path = _db_path()
+    cache = LLMResponseCache(db_path=db_path, memory_size=2)
+    for i in range(3):
+        cache.set(f"key{i}", "title", f"value{i}")
+
+    assert cache.stats()["memory_entries"] == 2
+    assert cache.get("key0") == "value0"
+    # A second instance sees the same SQLite rows
+    assert LLMResponseCache(db_path=db_path).get("key2") == "value2"
+
+def test_response_cache_ttl_expiry(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = LLMResponseCache(db_path=_db_path(), ttl_seconds=60)
+    cache.set("key", "title", "value")
+
+    now[0] += 59
+    assert cache.get("key") == "value"
+    now[0] += 2
+    assert cache.get("key") is None
+    assert cache.cleanup_expired() == 1
+
+def test_response_cache_invalidate_by_kind():
+    cache = LLMResponseCache(db_path=_db_path())
+    cache.set("t", "title", "title value")
+    cache.set("e", "excerpt", "excerpt value")
+
+    assert cache.invalidate(kind="title") == 1
+    assert cache.get("t") is None
+    assert cache.get("e") == "excerpt value"
+
+def test_semantic_cache_threshold():
+    text = "Parliament passes new climate bill after a long debate over emissions targets and costs"
+    cache = SemanticCache("excerpt", db_path=_db_path())
+    cache.add(text, "stored")
+
+    # Punctuation and spacing don't change the word set
+    assert cache.lookup(text.replace(" after", ",  after") + ".") == "stored"
+    # One lowercase word changed out of 15 is a Jaccard of 14/16, below the 0.95 default
+    reworded = text.replace("long", "lengthy")
+    assert cache.lookup(reworded) is None
+
+    loose = SemanticCache("excerpt", db_path=_db_path(), threshold=0.85)
+    loose.add(text, "stored")
+    assert loose.lookup(reworded) == "stored"
+
+def test_semantic_cache_ignores_changed_figures():
+    cache = SemanticCache("excerpt", db_path=_db_path())
+    cache.add(FLOOD_12, "Floods have killed 12 people.")
+
+    # Word overlap alone clears the threshold, so only the figure check keeps the stories apart
+    tokens_12, tokens_15 = SemanticCache._tokens(FLOOD_12), SemanticCache._tokens(FLOOD_15)
+    assert len(tokens_12 & tokens_15) / len(tokens_12 | tokens_15) >= cache.threshold
+
+    # Same wording, different death toll: the earlier excerpt would state the wrong number
+    assert cache.lookup(FLOOD_15) is None
+    assert cache.lookup(FLOOD_12) == "Floods have killed 12 people."
+
+def test_title_cache_ignores_changed_figures_in_description():
+    # The title generator keys on the original title followed by the meta description
+    cache = SemanticCache("title", db_path=_db_path())
+    title = "Floods sweep northern province as rescue teams search for missing residents"
+    description = ("Death toll rises to 12 after floods sweep northern province, officials say, "
+                   "as emergency crews evacuate villages, power lines come down across several districts "
+                   "and forecasters warn of more storms arriving later this week.")
+    cache.add(f"{title} {description}", "Floods in Northern Province Kill 12")
+
+    updated = f"{title} {description.replace('12', '15')}"
+    original_tokens, updated_tokens = SemanticCache._tokens(f"{title} {description}"), SemanticCache._tokens(updated)
+    assert len(original_tokens & updated_tokens) / len(original_tokens | updated_tokens) >= cache.threshold
+    assert cache.lookup(updated) is None
+    assert cache.lookup(f"{title} {description}") == "Floods in Northern Province Kill 12"
+
+def test_semantic_cache_skips_rows_written_before_facts_were_stored():
+    db_path = _db_path()
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE semantic_cache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            tokens TEXT NOT NULL,
+            value TEXT NOT NULL,
+            created_at INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT INTO semantic_cache (kind, tokens, value, created_at) VALUES (?, ?, ?, ?)",
+                 ("excerpt", " ".join(SemanticCache._tokens(FLOOD_12)), "old", int(llm_cache.time.time())))
+    conn.commit()
+    conn.close()
+
+    cache = SemanticCache("excerpt", db_path=db_path)
+    assert cache.lookup(FLOOD_15) is None
+    cache.add(FLOOD_12, "new")
+    assert SemanticCache("excerpt", db_path=db_path).lookup(FLOOD_12) == "new"
@@ -5,13 +5,26 @@ Processes multiple articles simultaneously using multiprocessing.
 """
 
 import multiprocessing
-import subprocess
 import time
 import sys
 import os
 from typing import List, Dict, Any
 import sqlite3
 from datetime import datetime
+from article_fetch import fetch_article
+from sync_title_generator import SyncNeutralTitleGenerator
+from sync_excerpt_generator import SyncNeutralExcerptGenerator
+from sync_identifier_generator import SyncIdentifierGenerator
+
+# Generators for this worker process, created on first use and reused for every article it handles
+_generators = None
+
+def _get_generators():
+    """This process's title, excerpt and identifier generators"""
+    global _generators
+    if _generators is None:
+        _generators = (SyncNeutralTitleGenerator(), SyncNeutralExcerptGenerator(), SyncIdentifierGenerator())
+    return _generators
 
 class WorkerPoolProcessor:
     def __init__(self, num_workers=3, base_path="/root/Beacon"):
@@ -25,77 +38,45 @@ class WorkerPoolProcessor:
         try:
             print(f"Worker processing article {article_id}: {url}")
             
-            # Step 1: Generate title
-            title_result = subprocess.run([
-                "python3", f"{self.base_path}/sync_title_generator.py", url
-            ], capture_output=True, text=True, timeout=120)
-            
-            if title_result.returncode != 0:
-                return {"article_id": article_id, "success": False, "error": f"Title generation failed: {title_result.stderr}"}
+            # Step 1: Fetch the article once and run the generators in this process;
+            # results come back as Python objects instead of being parsed from subprocess output
+            title_generator, excerpt_generator, identifier_generator = _get_generators()
+            prefetched = fetch_article(title_generator.session, url)
+            if not prefetched:
+                return {"article_id": article_id, "success": False, "error": "Failed to fetch article content"}
             
-            # Step 2: Generate excerpt
-            excerpt_result = subprocess.run([
-                "python3", f"{self.base_path}/sync_excerpt_generator.py", url
-            ], capture_output=True, text=True, timeout=120)
+            # Step 2: Generate title
+            title_result = title_generator.generate_neutral_title(url, prefetched)
+            if not title_result.get("success"):
+                return {"article_id": article_id, "success": False, "error": f"Title generation failed: {title_result.get('error')}"}
             
-            if excerpt_result.returncode != 0:
-                return {"article_id": article_id, "success": False, "error": f"Excerpt generation failed: {excerpt_result.stderr}"}
+            # Step 3: Generate excerpt
+            excerpt_result = excerpt_generator.generate_neutral_excerpt(url, prefetched)
+            if not excerpt_result.get("success"):
+                return {"article_id": article_id, "success": False, "error": f"Excerpt generation failed: {excerpt_result.get('error')}"}
             
-            # Step 3: Generate identifiers
-            identifier_result = subprocess.run([
-                "python3", f"{self.base_path}/sync_identifier_generator.py", url
-            ], capture_output=True, text=True, timeout=120)
+            # Step 4: Generate identifiers
+            identifiers = identifier_generator.generate_identifiers(url, prefetched)
+            if not identifiers:
+                return {"article_id": article_id, "success": False, "error": "Identifier generation failed"}
             
-            if identifier_result.returncode != 0:
-                return {"article_id": article_id, "success": False, "error": f"Identifier generation failed: {identifier_result.stderr}"}
-            
-            # Parse identifier output
-            identifiers = self.parse_identifier_output(identifier_result.stdout)
+            title = title_result["neutral_title"]
+            excerpt = excerpt_result["neutral_excerpt"]
             
             # Update database
-            self.update_database(article_id, title_result.stdout, excerpt_result.stdout, identifiers)
+            self.update_database(article_id, title, excerpt, identifiers)
             
             return {
                 "article_id": article_id,
                 "success": True,
-                "title": title_result.stdout.strip(),
-                "excerpt": excerpt_result.stdout.strip(),
+                "title": title.strip(),
+                "excerpt": excerpt.strip(),
                 "identifiers": identifiers
             }
             
         except Exception as e:
             return {"article_id": article_id, "success": False, "error": str(e)}
     
-    def parse_identifier_output(self, output: str):
-        """Parse identifier generator output"""
-        try:
-            import json
-            import re
-            
-            # Look for the generated identifiers in the output
-            lines = output.split('\n')
-            identifiers = {}
-            
-            for line in lines:
-                if 'topic_primary:' in line:
-                    identifiers['topic_primary'] = line.split('topic_primary:')[1].strip()
-                elif 'topic_secondary:' in line:
-                    identifiers['topic_secondary'] = line.split('topic_secondary:')[1].strip()
-                elif 'entity_primary:' in line:
-                    identifiers['entity_primary'] = line.split('entity_primary:')[1].strip()
-                elif 'entity_secondary:' in line:
-                    identifiers['entity_secondary'] = line.split('entity_secondary:')[1].strip()
-                elif 'location_primary:' in line:
-                    identifiers['location_primary'] = line.split('location_primary:')[1].strip()
-                elif 'event_or_policy:' in line:
-                    identifiers['event_or_policy'] = line.split('event_or_policy:')[1].strip()
-            
-            return identifiers
-            
-        except Exception as e:
-            print(f"Error parsing identifiers: {e}")
-            return {}
-    
     def update_database(self, article_id: int, title: str, excerpt: str, identifiers: Dict):
         """Update database with results"""
         try:
@@ -132,13 +113,13 @@ class WorkerPoolProcessor:
         """Process multiple articles in parallel using worker pool"""
         print(f"Processing {len(articles)} articles with {self.num_workers} workers...")
         
-        start_time = time.time()
+        start_time = time.monotonic()
         
         # Use multiprocessing Pool
         with multiprocessing.Pool(processes=self.num_workers) as pool:
             results = pool.map(self.process_single_article, articles)
         
-        end_time = time.time()
+        end_time = time.monotonic()
         processing_time = end_time - start_time
         
         print(f"Completed processing in {processing_time:.2f} seconds")